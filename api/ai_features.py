@@ -1,7 +1,7 @@
 import logging
 from typing import Any, Dict
 from fastapi import APIRouter, Depends, HTTPException, Request , Body
-from dependencies import ( call_gemini_async, db, get_current_user, limiter, track_event, safe_parse_json)
+from dependencies import ( call_gemini_async, db, get_current_user, limiter, track_event, safe_parse_json, invalidate_user_cache)
 from api.models import (APIResponse,RemixRequest, FusionRequest, ArchitectRequest, AnalyzeRequest,KillSwitchRequest)
 from services.architect_service import ArchitectInput, ArchitectService
 import hashlib, json
@@ -28,6 +28,7 @@ async def _atomic_debit(user_id: str, cost: int) -> int:
     )
     if not res:
         raise HTTPException(status_code=402, detail=f"Insufficient credits. This action costs {cost} credit(s).")
+    await invalidate_user_cache(user_id)
     return int(res.get("credits", {}).get("balance", 0))
 
 
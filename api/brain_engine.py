@@ -1,6 +1,7 @@
 # FastAPI router for Brain Engine endpoints (MVP)
 from fastapi import APIRouter, Request, Depends, HTTPException
 from middleware.auth import get_current_user, require_pro_plan
+from dependencies import invalidate_user_cache
 from services.brain_engine.engine import BrainEngine
 from api.models import APIResponse
 from utils.rate_limiting import require_credits_and_rate_limit
@@ -135,6 +136,7 @@ async def quick_upgrade(
             # Optionally update credits/subscription
             if "credits" in user and isinstance(user["credits"], dict):
                 await db.users.update_one({"uid": user["uid"]}, {"$inc": {"credits.balance": -1}})
+            await invalidate_user_cache(user["uid"])
         except Exception as logerr:
             logging.warning(f"Failed to log usage event or update stats: {logerr}")
         return APIResponse(data=result, message="Prompt upgraded via Brain Engine")
@@ -265,6 +267,7 @@ async def full_upgrade(
             # Optionally update credits/subscription
             if "credits" in user and isinstance(user["credits"], dict):
                 await db.users.update_one({"uid": user["uid"]}, {"$inc": {"credits.balance": -1}})
+            await invalidate_user_cache(user["uid"])
         except Exception as logerr:
             debug_print("Failed to log usage event or update stats: %s", str(logerr))
         debug_print("returning APIResponse to caller")
@@ -257,6 +257,8 @@ async def upgrade_v2(
         await db.users.update_one({"uid": user.get("uid")}, {"$inc": {"stats.prompts_upgraded": 1}})
         if "credits" in user and isinstance(user["credits"], dict):
             await db.users.update_one({"uid": user.get("uid")}, {"$inc": {"credits.balance": -1}})
+        from dependencies import invalidate_user_cache
+        await invalidate_user_cache(user.get("uid"))
     except Exception as logerr:
         import logging
         logging.warning(f"Failed to log demon upgrade or update stats: {logerr}")
@@ -9,7 +9,7 @@ from datetime import datetime
 
 from middleware.auth import get_current_user, require_plan
 from services.email_automation_waifu import email_automation, EmailType
-from dependencies import db
+from dependencies import db, invalidate_user_cache
 from api.models import APIResponse
 
 router = APIRouter()
@@ -200,6 +200,7 @@ async def update_email_preferences(
                 }
             }
         )
+        await invalidate_user_cache(user_id)
         
         return APIResponse(
             data=preferences.dict(),
@@ -244,6 +245,7 @@ async def unsubscribe_from_emails(
                 }
             )
             message = "Unsubscribed from marketing emails"
+        await invalidate_user_cache(user_id)
         
         return APIResponse(
             data={"unsubscribed": True, "email": email, "type": email_type or "marketing"},
@@ -10,7 +10,7 @@ from pydantic import BaseModel
 from typing import Any, Dict
 from services.oracle_service import OracleService, IdeaInput
 from api.models import APIResponse
-from dependencies import get_oracle_service, require_user
+from dependencies import get_oracle_service, require_user, invalidate_user_cache
 from utils import camelize
 
 router = APIRouter(tags=["Ideas"])
@@ -90,6 +90,7 @@ async def generate_ideas(
         # Debit credits only after successful idea generation and save
         debug_print(f"Debiting {ideas_cost} credits from user {user_id} (credits.balance)")
         await db.users.update_one({"_id": user_id}, {"$inc": {"credits.balance": -ideas_cost}})
+        await invalidate_user_cache(user_id)
         # Track usage for dashboard analytics
         from dependencies import track_usage
         await track_usage(
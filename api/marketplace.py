@@ -12,7 +12,7 @@ from bson import ObjectId
 from pymongo import DESCENDING
 from fastapi import APIRouter, Depends, HTTPException, Query, Request, Body
 import logging
-from dependencies import get_current_user, db
+from dependencies import get_current_user, db, invalidate_user_cache
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from bson import ObjectId
@@ -95,6 +95,7 @@ async def purchase_marketplace_prompt(request: Request, purchase: MarketplacePur
     )
     if not user_doc:
         raise HTTPException(status_code=402, detail=f"Insufficient credits. Purchase costs {price_credits} credit(s).")
+    await invalidate_user_cache(user_id)
 
     # Mark ownership
     purchase_doc = {
@@ -9,7 +9,7 @@ from typing import Dict, List, Optional, Any, Literal
 from datetime import datetime, timedelta, timezone
 from bson import ObjectId
 
-from dependencies import limiter, get_current_user, db
+from dependencies import limiter, get_current_user, db, invalidate_user_cache
 from middleware.auth import require_plan
 from api.models import APIResponse
 
@@ -134,6 +134,7 @@ async def update_notification_preferences(
                 }
             }
         )
+        await invalidate_user_cache(user_id)
         
         return APIResponse(
             data=preferences.dict(),
@@ -23,7 +23,8 @@ from dependencies import (
     cache_key,
     cache_get,
     cache_set,
-    cache_delete
+    cache_delete,
+    invalidate_user_cache
 )
 
 router = APIRouter()
@@ -128,6 +129,7 @@ async def package_prompt_for_marketplace(
             raise HTTPException(status_code=403, detail="Marketplace packaging requires active Partner status")
         # daily limit exceeded
         raise HTTPException(status_code=429, detail=f"Daily packaging limit reached ({config['max_daily_packages']}/day)")
+    await invalidate_user_cache(user_id)
 
     # 2) Validate prompt + ensure latest version exists
     version_id = None
@@ -159,6 +161,7 @@ async def package_prompt_for_marketplace(
         # optional rollback of daily inc:
         # await db.users.update_one({"_id": user_id}, {"$inc": {f"dailyPackages.{today_key}": -1}})
         raise HTTPException(status_code=402, detail=f"Insufficient credits. Packaging costs {cost} credits.")
+    await invalidate_user_cache(user_id)
     new_credits = user_after_debit.get("credits", 0)
 
 
@@ -5,7 +5,7 @@ logger = logging.getLogger(__name__)
 import uuid
 from datetime import datetime, timedelta
 from typing import Dict, Any, List, Optional
-from dependencies import limiter ,get_current_user
+from dependencies import limiter ,get_current_user, invalidate_user_cache
 from pymongo import DESCENDING
 from api.models import PartnerRevenueRequest ,PartnershipApplicationRequest ,PartnerDashboardRequest
 
@@ -25,6 +25,7 @@ async def process_payout_request(user_id: str, user_data: dict, req: PartnerReve
         {"_id": payout_id, "user_id": user_id, "amount": amount, "status": "requested", "created_at": now}
     )
     await db.users.update_one({"_id": user_id}, {"$inc": {"pendingPayoutAmount": -amount}})
+    await invalidate_user_cache(user_id)
 
     await track_event(
         user_id=user_id,
@@ -137,6 +138,7 @@ async def request_partnership_enhanced(
                         }
                     },
                 )
+                await invalidate_user_cache(user_id)
 
             # 5) Usage + analytics
             current_month = now.strftime("%Y-%m")
@@ -1,6 +1,6 @@
 # Pro Plan & Subscription API (MongoDB-native)
 from fastapi import APIRouter, Depends, HTTPException, Body
-from dependencies import get_current_user, db
+from dependencies import get_current_user, db, invalidate_user_cache
 from datetime import datetime
 
 router = APIRouter(tags=["Plans"])
@@ -31,6 +31,7 @@ async def upgrade_plan(payload: dict = Body(...), user: dict = Depends(get_curre
         raise HTTPException(status_code=400, detail="Invalid duration")
     expires = datetime.utcnow() + __import__('datetime').timedelta(days=duration)
     await db.users.update_one({"uid": user["uid"]}, {"$set": {"plan": plan, "plan_expires": expires}}, upsert=True)
+    await invalidate_user_cache(user["uid"])
     return {"status": "upgraded", "plan": plan, "expires": expires.isoformat()}
 
 @router.get("/plans/check_pro")
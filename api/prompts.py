@@ -19,6 +19,7 @@ from dependencies import (
     db,
     get_current_user,
     limiter,
+    invalidate_user_cache,
 )
 from api.models import SavePromptRequest, TestDriveByIdRequest, UpdatePromptRequest , APIResponse
 
@@ -392,6 +393,7 @@ async def test_drive_prompt_by_id(
             )
             if not res:
                 raise HTTPException(status_code=402, detail=f"Insufficient credits. Test driving costs {cost} credit(s).")
+            await invalidate_user_cache(user_id)
             new_credits = res.get("credits", 0)
 
             # Update monthly usage
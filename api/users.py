@@ -17,7 +17,7 @@ from fastapi import APIRouter, Depends, HTTPException, Request, Response, Upload
 from pymongo import ReturnDocument, DESCENDING, ASCENDING
 from slowapi import Limiter
 from slowapi.util import get_remote_address
-from dependencies import db, limiter, mongo_client, track_event, get_current_user, n8n
+from dependencies import db, limiter, mongo_client, track_event, get_current_user, n8n, invalidate_user_cache
 from auth import require_user, verify_firebase_token
 from api.models import PreferencesModel, APIResponse
 from utils.camelize import camelize
@@ -95,6 +95,7 @@ async def upload_avatar(request: Request, user: dict = Depends(require_user()),
     await db.avatar_cache.replace_one({"_id": cache_key}, {"_id": cache_key, "data": base64.b64encode(img_bytes).decode(), "expires_at": time.time() + 86400}, upsert=True)
     avatar_url = f"/api/v1/users/{user_id}/avatar"
     await db.users.update_one({"_id": user_id}, {"$set": {"photo_url": avatar_url}})
+    await invalidate_user_cache(user_id)
     await track_event(user_id=user_id, event_type="avatar_uploaded", event_data={"size": len(img_bytes)})
     return APIResponse(data={"avatar_url": avatar_url}, message="Avatar uploaded successfully")
 
@@ -120,6 +121,7 @@ async def proxy_avatar(uid: str, request: Request):
                         img_bytes = await resp.read()
                         await db.avatar_cache.replace_one({"_id": cache_key}, {"_id": cache_key, "data": base64.b64encode(img_bytes).decode(), "expires_at": time.time() + 86400}, upsert=True)
                         await db.users.update_one({"_id": uid}, {"$set": {"photo_url": f"/api/v1/users/{uid}/avatar"}})
+                        await invalidate_user_cache(uid)
                         return Response(content=img_bytes, media_type="image/jpeg", headers={"Cache-Control": "public, max-age=86400"})
                     elif resp.status in [429, 500, 502, 503, 504]:
                         await asyncio.sleep(2 ** attempt)
@@ -198,6 +200,7 @@ async def proxy_avatar(uid: str, request: Request):
                         await db.avatar_cache.replace_one({"_id": cache_key}, {"_id": cache_key, "data": base64.b64encode(img_bytes).decode(), "expires_at": time.time() + 86400}, upsert=True)
                         # Cache path in user profile
                         await db.users.update_one({"_id": uid}, {"$set": {"photo_url": f"/api/v1/users/{uid}/avatar"}})
+                        await invalidate_user_cache(uid)
                         return Response(content=img_bytes, media_type="image/jpeg", headers={"Cache-Control": "public, max-age=86400"})
                     elif resp.status in [429, 500, 502, 503, 504]:
                         await asyncio.sleep(2 ** attempt)  # Exponential backoff
@@ -261,6 +264,7 @@ async def update_profile(body: dict, user: dict = Depends(require_user())):
     doc = await db.users.find_one_and_update({"_id": uid}, {"$set": updates}, return_document=ReturnDocument.AFTER)
     if not doc:
         raise HTTPException(status_code=404, detail="User not found")
+    await invalidate_user_cache(uid)
     return APIResponse(message="Profile updated", data=camelize({"displayName": doc.get("display_name")}))
 
 
@@ -449,6 +453,8 @@ async def auth_complete(request: Request, decoded=Depends(verify_firebase_token)
             {"$inc": {"credits.balance": 25}, "$set": {"credits.starter_grant_used": True}}
         )
         debug_print(f"Starter grant applied for {uid}")
+    # Login upsert, country and starter grant all changed the profile
+    await invalidate_user_cache(uid)
 
     # Welcome notification: idempotent, only on firstLogin
     if is_new:
@@ -745,6 +751,7 @@ async def delete_user_account(request: Request, user: dict = Depends(require_use
             await db.users.delete_one({"_id": user_id}, session=session)
             debug_print(f"Deleted user profile for user_id={user_id}")
 
+        await invalidate_user_cache(user_id)
         logger.warning(f"Account deletion completed for UID: {user_id}")
         debug_print(f"Account deletion completed for user_id={user_id}")
         return APIResponse(data=camelize({"deleted_user_id": user_id}), message="Account deleted successfully")
@@ -815,6 +822,7 @@ async def update_user_preferences(
     try:
         prefs_doc = {"preferences": {**preferences, "updated_at": _now()}}
         await db["users"].update_one({"_id": user_id}, {"$set": prefs_doc})
+        await invalidate_user_cache(user_id)
         debug_print(f"Updated preferences in db for user_id={user_id}")
         try:
             await n8n.trigger_webhook('user-preferences-updated', {
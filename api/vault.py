@@ -1,6 +1,6 @@
 
 from fastapi import APIRouter, Depends, HTTPException, Body
-from dependencies import get_current_user, db
+from dependencies import get_current_user, db, invalidate_user_cache
 
 router = APIRouter(tags=["Prompt Vault"])
 
@@ -121,6 +121,7 @@ async def save_prompt(payload: dict = Body(...), user: dict = Depends(get_curren
     try:
         await db.users.update_one({"uid": user["uid"]}, {"$inc": {"stats.prompts_created": 1}})
         await db.users.update_one({"uid": user["uid"]}, {"$push": {"saved_prompts": str(ins.inserted_id)}})
+        await invalidate_user_cache(user["uid"])
     except Exception as logerr:
         import logging
         logging.warning(f"Failed to update user stats or saved_prompts: {logerr}")
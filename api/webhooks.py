@@ -14,8 +14,6 @@ RAZORPAY_WEBHOOK_SECRET = os.getenv("RAZORPAY_WEBHOOK_SECRET")
 # Health endpoint removed - duplicate of main health endpoint at /health
 # Use main health endpoint instead: GET /health or GET /api/v1/health
 
-from dependencies import is_duplicate_event, mark_event_processed
-
 async def process_successful_payment(payment_intent: Dict[str, Any]):
     """Adds credits to a user account after a successful Stripe payment."""
     logger.info("Processing successful payment...")
@@ -39,6 +37,7 @@ async def process_successful_payment(payment_intent: Dict[str, Any]):
         if res.matched_count == 0:
             logger.error(f"User not found for Stripe payment: {user_id}")
             return
+        await invalidate_user_cache(user_id)
         # Log transaction
         tx_doc = {
             "user_id": user_id,
@@ -73,18 +72,17 @@ async def process_successful_payment(payment_intent: Dict[str, Any]):
 #         raise HTTPException(status_code=400, detail="Invalid signature")
 #
 #     event_id = event["id"]
-#     from dependencies import is_duplicate_event, mark_event_processed
-#     if await is_duplicate_event(event_id):
+#     from dependencies import claim_event
+#     # Single atomic claim (unique index on event_id) instead of find-then-insert
+#     if not await claim_event(event_id):
 #         logger.info(f"Duplicate Stripe event: {event_id}")
 #         return APIResponse(data=None, message="Duplicate event", status_code=200)
-#
-#     await mark_event_processed(event_id)
 
 # ------------------------------ PADDLE: WEBHOOK ------------------------------
 
 # --- SECURE PADDLE WEBHOOK HANDLER ---
 from utils.payment_utils import verify_signature
-from dependencies import db, track_event
+from dependencies import db, track_event, invalidate_user_cache
 from demon_engine.services.brain_engine.analytics import log_event
 import datetime
 import razorpay
@@ -134,6 +132,7 @@ async def paddle_webhook(request: Request):
          "$inc": {"credits.balance": credits_to_add}},
         upsert=True
     )
+    await invalidate_user_cache(user_id)
     # Log transaction
     tx_doc = {
         "user_id": user_id,
@@ -238,6 +237,7 @@ async def razorpay_webhook(request: Request):
             print(f"[DEBUG webhook] DB update result: matched={res.matched_count}, upserted={res.upserted_id}")
             if res.matched_count == 0 and res.upserted_id is None:
                 raise Exception("User not found or not updated")
+            await invalidate_user_cache(user_id)
             tx_doc["credits_added"] = credits_to_add
             await db.transactions.insert_one(tx_doc)
             print(f"[DEBUG webhook] Transaction inserted for user {user_id}, order {order_id}")
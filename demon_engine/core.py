@@ -2,26 +2,43 @@
 # Where 230 techniques become an unstoppable self-evolving prompt orchestration system
 
 import asyncio
+import hashlib
 import json
+import os
 import logging
 from typing import List, Dict, Any, Optional, Tuple
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import numpy as np
+import httpx
+import xxhash
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from dataclasses import replace
 from pymongo import UpdateOne, IndexModel, ASCENDING, DESCENDING
 import openai
 from sentence_transformers import SentenceTransformer
 import re
 
 from .schemas import (
-    TechniqueCore, QueryAnalysis, TechniqueScore, TechniquePipeline,
+    TechniqueCore, TechniqueView, QueryAnalysis, TechniqueScore, TechniquePipeline, TechniquePipelineSoA, EmbeddingStore,
     ExecutionResult, ExplainabilityLog, DemonEngineRequest, DemonEngineResponse,
     DemonEngineConfig, MongoCollections, DifficultyLevel, CategoryType
 )
-from .helpers import DemonEngineHelpers
+from .helpers import (
+    generate_selection_reason, determine_execution_order, build_mega_prompt,
+    finalize_output, post_process_output, validate_output, calculate_fidelity_score,
+    generate_explanation, try_parse_json
+)
 
 logger = logging.getLogger(__name__)
 
+# Representative queries used to warm the embedding model at startup
+_WARMUP_QUERIES = [
+    "brainstorm ideas for a product launch",
+    "write a python function to parse json",
+    "analyze and review this architecture",
+    "explain how vector search works",
+]
+
 class DemonEngineBrain:
     """
     🧙‍♂️ The Legendary Demon Engine Brain
@@ -30,15 +47,36 @@ class DemonEngineBrain:
     Elon-making-cry, enterprise-grade prompt orchestration system.
     """
     
+    # Static system message - built once, reused for every completion
+    _SYSTEM_MSG = {
+        "role": "system",
+        "content": "You are an expert AI assistant with advanced prompt engineering capabilities."
+    }
+    
     def __init__(self, config: DemonEngineConfig, db: AsyncIOMotorDatabase):
         self.config = config
         self.db = db
         self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-        self.openai_client = openai.AsyncOpenAI()
+        # Keep-alive HTTP/2 pool so requests under load reuse connections
+        self.openai_client = openai.AsyncOpenAI(
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_keepalive_connections=64, max_connections=128),
+                timeout=30
+            )
+        )
         
         # Technique cache for speed 🚀
-        self._technique_cache: Dict[str, TechniqueCore] = {}
+        self._technique_cache: Dict[str, TechniqueView] = {}
         self._pipeline_cache: Dict[str, TechniquePipeline] = {}
+        self._rendered_block_cache: Dict[str, str] = {}  # technique_id -> prompt section
+        # Description embeddings as one matrix (local similarity search, no Mongo round trip)
+        self.embedding_store = EmbeddingStore()
+        
+        # Micro-batching of concurrent query embeddings (started lazily on first use)
+        self._encode_batch_queue: Optional[asyncio.Queue] = None
+        self._batch_encoder_task: Optional[asyncio.Task] = None
+        self._encoder_loop: Optional[asyncio.AbstractEventLoop] = None
         
         logger.info("🔥 Demon Engine Brain initialized - Ready to make Elon cry!")
 
@@ -49,20 +87,22 @@ class DemonEngineBrain:
         logger.info("🔮 Loading compendium into Demon Engine Brain...")
         
         # Load the JSON compendium
-        with open(compendium_path, 'r', encoding='utf-8') as f:
-            techniques_data = json.load(f)
+        with open(compendium_path, 'rb') as f:
+            raw = f.read()
+        techniques_data = json.loads(raw.decode('utf-8'))
+        
+        # Create embeddings for description + tags + use_cases
+        embeddings = self._load_or_encode_embeddings(compendium_path, raw, techniques_data)
         
         techniques_to_insert = []
         
-        for tech_data in techniques_data:
-            # Create embeddings for description + tags + use_cases
-            content_for_embedding = f"{tech_data['description']} {' '.join(tech_data['tags'])} {' '.join(tech_data['use_cases'])}"
-            description_embedding = self.embedding_model.encode(content_for_embedding).tolist()
-            
+        # Catalog (re)load invalidates rendered prompt sections
+        self._rendered_block_cache.clear()
+        
+        for tech_data, embedding in zip(techniques_data, embeddings):
             # Create enhanced technique
             technique = TechniqueCore(
                 **tech_data,
-                description_embedding=description_embedding,
                 # Auto-assign difficulty based on complexity indicators
                 difficulty=self._infer_difficulty(tech_data),
                 # Estimate tokens based on description length and complexity
@@ -72,8 +112,13 @@ class DemonEngineBrain:
                 success_rate=0.8
             )
             
-            techniques_to_insert.append(technique.dict())
-            self._technique_cache[technique.id] = technique
+            # Embedding goes to MongoDB for $vectorSearch but stays off the model
+            tech_doc = technique.dict()
+            tech_doc["description_embedding"] = embedding.tolist()
+            techniques_to_insert.append(tech_doc)
+            self._technique_cache[technique.id] = TechniqueView.from_core(technique)
+        
+        self.embedding_store = EmbeddingStore.from_vectors([t["id"] for t in techniques_data], embeddings)
         
         # Insert into MongoDB with upsert
         if techniques_to_insert:
@@ -94,12 +139,77 @@ class DemonEngineBrain:
         
         return len(techniques_to_insert)
 
+    def _load_or_encode_embeddings(self, compendium_path: str, raw: bytes, techniques_data: List[Dict[str, Any]]) -> np.ndarray:
+        """
+        💾 Reuse embeddings cached next to the compendium when its content is unchanged
+        """
+        sha = hashlib.sha256(raw).hexdigest()
+        cache_path = f"{compendium_path}.emb.{sha}.npz"
+        
+        if os.path.exists(cache_path):
+            try:
+                embs = np.load(cache_path)['embs']
+                if len(embs) == len(techniques_data):
+                    logger.info(f"💾 Loaded cached compendium embeddings from {cache_path}")
+                    return embs
+            except Exception as e:
+                logger.warning(f"⚠️ Ignoring unreadable embedding cache {cache_path}: {e}")
+        
+        contents = [
+            f"{t['description']} {' '.join(t['tags'])} {' '.join(t['use_cases'])}"
+            for t in techniques_data
+        ]
+        embs = self.embedding_model.encode(contents, batch_size=32)
+        
+        try:
+            np.savez_compressed(cache_path, embs=embs)
+        except OSError as e:
+            logger.warning(f"⚠️ Could not persist embedding cache {cache_path}: {e}")
+        
+        return embs
+
+    async def load_technique_cache(self) -> int:
+        """
+        🧠 Prime the in-process technique cache and embedding matrix from MongoDB
+        """
+        cursor = self.db[MongoCollections.TECHNIQUES].find(
+            {}, {"_id": 0, "metadata_embedding": 0}
+        )
+        ids: List[str] = []
+        vectors: List[List[float]] = []
+        async for doc in cursor:
+            embedding = doc.pop("description_embedding", None)
+            technique = TechniqueCore(**doc)
+            self._technique_cache[technique.id] = TechniqueView.from_core(technique)
+            if embedding:
+                ids.append(technique.id)
+                vectors.append(embedding)
+        if vectors:
+            self.embedding_store = EmbeddingStore.from_vectors(ids, vectors)
+        self._rendered_block_cache.clear()
+        return len(self._technique_cache)
+
+    def warm_embeddings(self, queries: Optional[List[str]] = None):
+        """
+        🔥 Run a few stock queries through the embedding model so the first request doesn't pay for it
+        """
+        self.embedding_model.encode(list(queries or _WARMUP_QUERIES), batch_size=32)
+
+    async def warmup(self):
+        """
+        🔥 Open the MongoDB pool, prime the technique cache and the embedding model before serving
+        """
+        await self.db[MongoCollections.TECHNIQUES].find_one({}, {"_id": 1})
+        loaded = await self.load_technique_cache()
+        await asyncio.to_thread(self.warm_embeddings)
+        logger.info(f"🔥 Demon Engine warmed up - {loaded} techniques cached")
+
     async def process_query(self, request: DemonEngineRequest) -> DemonEngineResponse:
         """
         🎯 The main brain function - transforms raw queries into god-tier outputs
         """
         try:
-            start_time = datetime.utcnow()
+            start_time = datetime.now(timezone.utc)
             
             # 1. 🧠 Analyze the query
             query_analysis = await self._analyze_query(request.query)
@@ -116,12 +226,12 @@ class DemonEngineBrain:
             # 5. 🔮 Generate explanation (if requested)
             explanation = None
             if request.explain:
-                explanation = await self._generate_explanation(pipeline, query_analysis, execution_result)
+                explanation = self._generate_explanation(pipeline, query_analysis, execution_result)
             
             # 6. 📊 Log for learning
             await self._log_execution(execution_result, query_analysis, pipeline)
             
-            execution_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+            execution_time = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
             
             return DemonEngineResponse(
                 success=True,
@@ -174,8 +284,8 @@ class DemonEngineBrain:
         # Extract constraints
         constraints = self._extract_constraints(cleaned_query)
         
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(cleaned_query).tolist()
+        # Generate query embedding off the event loop - the only non-trivial step here
+        query_embedding = (await self._encode_request(cleaned_query)).tolist()
         
         return QueryAnalysis(
             raw_query=query,
@@ -190,11 +300,102 @@ class DemonEngineBrain:
             confidence_score=0.85  # Could be improved with ML model
         )
 
+    async def _encode_request(self, text: str) -> np.ndarray:
+        """
+        🧵 Queue a query for the batch encoder and wait for its embedding row
+        """
+        loop = asyncio.get_running_loop()
+        if self._encoder_loop is not loop:
+            # Queue and task are bound to the loop they were made on; anything left on the old one can't be served
+            self._fail_pending_encodes(RuntimeError("Event loop changed before the query was encoded"))
+            self._encode_batch_queue = asyncio.Queue()
+            self._batch_encoder_task = None
+            self._encoder_loop = loop
+        if self._batch_encoder_task is None or self._batch_encoder_task.done():
+            # Same loop: keep the queue so requests already waiting on it are picked up by the new task
+            self._batch_encoder_task = loop.create_task(self._batch_encoder())
+        
+        future = loop.create_future()
+        await self._encode_batch_queue.put((text, future))
+        return await future
+
+    def _fail_pending_encodes(self, exc: BaseException) -> None:
+        """Fail every queued (text, future) so its caller stops waiting"""
+        queue = self._encode_batch_queue
+        while queue is not None and not queue.empty():
+            _, future = queue.get_nowait()
+            if not future.done():
+                future.set_exception(exc)
+
+    async def close(self):
+        """
+        🛑 Stop the batch encoder and fail queries still waiting on it (app shutdown)
+        """
+        task, self._batch_encoder_task = self._batch_encoder_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._fail_pending_encodes(RuntimeError("Demon Engine is shutting down"))
+
+    async def _batch_encoder(self, max_batch: int = 32, max_wait: float = 0.005):
+        """
+        ⚡ Coalesce queries arriving within a few ms into one encode call off the event loop
+        """
+        queue = self._encode_batch_queue
+        batch = []
+        try:
+            while True:
+                batch = [await queue.get()]
+                deadline = asyncio.get_running_loop().time() + max_wait
+                
+                while len(batch) < max_batch:
+                    remaining = deadline - asyncio.get_running_loop().time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                
+                texts = [text for text, _ in batch]
+                try:
+                    embs = await asyncio.to_thread(self.embedding_model.encode, texts, batch_size=max_batch)
+                except Exception as e:
+                    logger.error(f"💥 Batch embedding failed: {e}")
+                    for _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                    continue
+                
+                for (_, future), emb in zip(batch, embs):
+                    if not future.done():
+                        future.set_result(emb)
+        except asyncio.CancelledError:
+            # Cancelled (shutdown): the current batch was already dequeued, release it here
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Demon Engine is shutting down"))
+            raise
+
     async def _retrieve_techniques(self, query_analysis: QueryAnalysis, request: DemonEngineRequest) -> List[TechniqueScore]:
         """
         🎯 Vector search + scoring to find the best techniques for this query
         """
-        # Vector similarity search in MongoDB
+        if len(self.embedding_store):
+            # One matrix-vector product over the in-process embedding matrix
+            candidates = self.embedding_store.search(query_analysis.query_embedding, self.config.max_techniques_retrieved)
+        else:
+            candidates = await self._vector_search(query_analysis)
+        
+        return self._score_candidates(candidates, query_analysis, request)
+
+    async def _vector_search(self, query_analysis: QueryAnalysis) -> List[Dict[str, Any]]:
+        """
+        🔭 Vector similarity search in MongoDB (used until the embedding matrix is loaded)
+        """
         pipeline = [
             {
                 "$vectorSearch": {
@@ -214,43 +415,58 @@ class DemonEngineBrain:
         
         # Execute vector search
         cursor = self.db[MongoCollections.TECHNIQUES].aggregate(pipeline)
-        candidates = await cursor.to_list(length=None)
-        
-        scored_techniques = []
+        return await cursor.to_list(length=None)
+
+    def _score_candidates(self, candidates: List[Dict[str, Any]], query_analysis: QueryAnalysis,
+                          request: DemonEngineRequest) -> List[TechniqueScore]:
+        """
+        🎯 Signal/penalty scoring and top-k ranking of retrieved candidates
+        """
+        # Accumulate score components per candidate; TechniqueScore objects are
+        # only materialized for the ranked survivors
+        techniques: List[TechniqueView] = []
+        semantic_scores: List[float] = []
+        signal_boosts: List[float] = []
+        penalties: List[float] = []
         
         for candidate in candidates:
-            technique = TechniqueCore(**candidate)
+            technique = self._technique_cache.get(candidate.get("id"))
+            if technique is None:
+                technique = TechniqueView.from_core(TechniqueCore(**candidate))
             
+            techniques.append(technique)
             # Base semantic score from vector search
-            semantic_score = candidate.get("semantic_score", 0.0)
-            
+            semantic_scores.append(candidate.get("semantic_score", 0.0))
             # Signal boosting
-            signal_boost = self._calculate_signal_boost(technique, query_analysis)
-            
+            signal_boosts.append(self._calculate_signal_boost(technique, query_analysis))
             # Penalty scoring (conflicts, complexity mismatches)
-            penalty = self._calculate_penalties(technique, query_analysis, request)
-            
-            # Complementary boosting (techniques that work well together)
-            complementary_boost = 0.0  # Will be calculated during pipeline building
-            
-            # Final score calculation
-            final_score = min(1.0, max(0.0, semantic_score + signal_boost - penalty))
-            
-            if final_score > self.config.vector_similarity_threshold:
-                scored_techniques.append(TechniqueScore(
-                    technique_id=technique.id,
-                    technique_name=technique.name,
-                    semantic_score=semantic_score,
-                    signal_boost=signal_boost,
-                    penalty_score=penalty,
-                    final_score=final_score,
-                    selection_reason=self._generate_selection_reason(technique, query_analysis, final_score)
-                ))
-        
-        # Sort by final score
-        scored_techniques.sort(key=lambda x: x.final_score, reverse=True)
-        
-        return scored_techniques[:self.config.max_techniques_retrieved]
+            penalties.append(self._calculate_penalties(technique, query_analysis, request))
+        
+        # Final score calculation for all candidates at once
+        # (complementary boost is applied later, during pipeline building)
+        scores = TechniquePipelineSoA.from_components(
+            [t.id for t in techniques], semantic_scores, signal_boosts, penalties
+        )
+        final_scores = scores.aggregate()
+        
+        # Rank survivors above the similarity threshold (vectorized top-k)
+        ranking = scores.top_k(self.config.max_techniques_retrieved, min_score=self.config.vector_similarity_threshold)
+        
+        scored_techniques = []
+        for i in ranking.tolist():
+            technique = techniques[i]
+            final_score = float(final_scores[i])
+            scored_techniques.append(TechniqueScore(
+                technique_id=technique.id,
+                technique_name=technique.name,
+                semantic_score=semantic_scores[i],
+                signal_boost=signal_boosts[i],
+                penalty_score=penalties[i],
+                final_score=final_score,
+                selection_reason=self._generate_selection_reason(technique, query_analysis, final_score)
+            ))
+        
+        return scored_techniques
 
     async def _build_pipeline(self, technique_scores: List[TechniqueScore], 
                             query_analysis: QueryAnalysis, request: DemonEngineRequest) -> TechniquePipeline:
@@ -300,13 +516,14 @@ class DemonEngineBrain:
         )
         
         # Calculate pipeline confidence
-        confidence = np.mean([t.final_score for t in selected_techniques])
+        scores = [t.final_score for t in selected_techniques]
+        confidence = sum(scores) / len(scores)
         
         return TechniquePipeline(
             techniques=selected_techniques,
             execution_order=execution_order,
             estimated_total_tokens=total_tokens,
-            confidence_score=float(confidence)
+            confidence_score=confidence
         )
 
     async def _execute_pipeline(self, pipeline: TechniquePipeline, 
@@ -314,19 +531,16 @@ class DemonEngineBrain:
         """
         ⚡ Execute the pipeline using the selected LLM
         """
-        start_time = datetime.utcnow()
+        start_time = datetime.now(timezone.utc)
         
         # Build the mega-prompt using all techniques
-        prompt = await self._build_mega_prompt(pipeline, query_analysis, request)
+        prompt = self._build_mega_prompt(pipeline, query_analysis, request)
         
         # Execute with OpenAI (or configured LLM)
         try:
             response = await self.openai_client.chat.completions.create(
                 model=self.config.default_model,
-                messages=[
-                    {"role": "system", "content": "You are an expert AI assistant with advanced prompt engineering capabilities."},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=[self._SYSTEM_MSG, {"role": "user", "content": prompt}],
                 max_tokens=self.config.max_tokens_per_request,
                 temperature=0.7
             )
@@ -338,14 +552,11 @@ class DemonEngineBrain:
             logger.error(f"💥 LLM execution failed: {str(e)}")
             raise
         
-        # Post-process and validate output
-        processed_output = await self._post_process_output(raw_output, query_analysis)
-        validation_passed, validation_errors = await self._validate_output(processed_output, query_analysis)
+        # Post-process, validate and score output in one pass
+        processed_output, validation_passed, validation_errors, fidelity_score = \
+            finalize_output(raw_output, query_analysis)
         
-        # Calculate quality scores
-        fidelity_score = await self._calculate_fidelity_score(processed_output, query_analysis)
-        
-        execution_time = (datetime.utcnow() - start_time).total_seconds() * 1000
+        execution_time = (datetime.now(timezone.utc) - start_time).total_seconds() * 1000
         
         return ExecutionResult(
             pipeline_id=pipeline.pipeline_id,
@@ -446,7 +657,7 @@ class DemonEngineBrain:
             constraints.append('fast')
         return constraints
 
-    def _calculate_signal_boost(self, technique: TechniqueCore, query_analysis: QueryAnalysis) -> float:
+    def _calculate_signal_boost(self, technique: TechniqueView, query_analysis: QueryAnalysis) -> float:
         """Calculate signal boost based on keyword matches and commands"""
         boost = 0.0
         
@@ -457,9 +668,8 @@ class DemonEngineBrain:
         
         # Keyword matches in metadata
         query_words = set(query_analysis.cleaned_query.split())
-        technique_keywords = set(technique.retrieval_metadata.get('keywords', []))
         
-        keyword_overlap = len(query_words.intersection(technique_keywords))
+        keyword_overlap = len(technique.keyword_set.intersection(query_words))
         if keyword_overlap > 0:
             boost += 0.1 * keyword_overlap
         
@@ -471,7 +681,7 @@ class DemonEngineBrain:
         
         return min(0.5, boost)  # Cap at 0.5
 
-    def _calculate_penalties(self, technique: TechniqueCore, query_analysis: QueryAnalysis, request: DemonEngineRequest) -> float:
+    def _calculate_penalties(self, technique: TechniqueView, query_analysis: QueryAnalysis, request: DemonEngineRequest) -> float:
         """Calculate penalty scores for mismatches"""
         penalty = 0.0
         
@@ -504,45 +714,45 @@ class DemonEngineBrain:
         await self.db[MongoCollections.TECHNIQUES].create_indexes(indexes)
         logger.info("📊 MongoDB indexes created for Demon Engine")
 
-    def _generate_selection_reason(self, technique: TechniqueCore, query_analysis: QueryAnalysis, score: float) -> str:
+    def _generate_selection_reason(self, technique: TechniqueView, query_analysis: QueryAnalysis, score: float) -> str:
         """🎯 Generate human-readable reason for technique selection"""
-        return DemonEngineHelpers.generate_selection_reason(technique, query_analysis, score)
+        return generate_selection_reason(technique, query_analysis, score)
 
     def _determine_execution_order(self, technique_scores: List[TechniqueScore]) -> List[int]:
         """🧪 Determine optimal execution order for techniques in pipeline"""
-        return DemonEngineHelpers.determine_execution_order(technique_scores)
+        return determine_execution_order(technique_scores)
 
-    async def _build_mega_prompt(self, pipeline: TechniquePipeline, query_analysis: QueryAnalysis, request: DemonEngineRequest) -> str:
+    def _build_mega_prompt(self, pipeline: TechniquePipeline, query_analysis: QueryAnalysis, request: DemonEngineRequest) -> str:
         """⚡ Build the ultimate mega-prompt using all selected techniques"""
-        return await DemonEngineHelpers.build_mega_prompt(pipeline, query_analysis, request, self)
+        return build_mega_prompt(pipeline, query_analysis, request, self)
 
-    async def _post_process_output(self, raw_output: str, query_analysis: QueryAnalysis) -> str:
+    def _post_process_output(self, raw_output: str, query_analysis: QueryAnalysis) -> str:
         """🔄 Post-process LLM output based on requirements"""
-        return await DemonEngineHelpers.post_process_output(raw_output, query_analysis)
+        return post_process_output(raw_output, query_analysis)
 
-    async def _validate_output(self, processed_output: str, query_analysis: QueryAnalysis) -> Tuple[bool, List[str]]:
+    def _validate_output(self, processed_output: str, query_analysis: QueryAnalysis) -> Tuple[bool, List[str]]:
         """🔍 Validate output meets requirements"""
-        return await DemonEngineHelpers.validate_output(processed_output, query_analysis)
+        return validate_output(processed_output, query_analysis)
 
-    async def _calculate_fidelity_score(self, processed_output: str, query_analysis: QueryAnalysis) -> float:
+    def _calculate_fidelity_score(self, processed_output: str, query_analysis: QueryAnalysis) -> float:
         """📊 Calculate how well output matches query requirements"""
-        return await DemonEngineHelpers.calculate_fidelity_score(processed_output, query_analysis)
+        return calculate_fidelity_score(processed_output, query_analysis)
 
-    async def _generate_explanation(self, pipeline: TechniquePipeline, query_analysis: QueryAnalysis, execution_result: ExecutionResult) -> ExplainabilityLog:
+    def _generate_explanation(self, pipeline: TechniquePipeline, query_analysis: QueryAnalysis, execution_result: ExecutionResult) -> ExplainabilityLog:
         """🔮 Generate detailed explanation of the Demon Engine process"""
-        return await DemonEngineHelpers.generate_explanation(pipeline, query_analysis, execution_result, self)
+        return generate_explanation(pipeline, query_analysis, execution_result, self)
 
     def _try_parse_json(self, text: str) -> Optional[Dict[str, Any]]:
         """Try to parse text as JSON, return None if invalid"""
-        return DemonEngineHelpers.try_parse_json(text)
+        return try_parse_json(text)
 
     async def _log_execution(self, execution_result: ExecutionResult, query_analysis: QueryAnalysis, pipeline: TechniquePipeline):
         """📊 Log execution for learning and analytics"""
         try:
             log_doc = {
-                "timestamp": datetime.utcnow(),
+                "timestamp": datetime.now(timezone.utc),
                 "pipeline_id": execution_result.pipeline_id,
-                "query_hash": hash(query_analysis.raw_query),  # Privacy-safe
+                "query_hash": xxhash.xxh64_hexdigest(query_analysis.raw_query.encode('utf-8')),  # Privacy-safe, stable across processes
                 "query_intent": query_analysis.intent_type,
                 "query_complexity": query_analysis.complexity_level,
                 "techniques_used": [t.technique_id for t in pipeline.techniques],
@@ -573,17 +783,22 @@ class DemonEngineBrain:
                         "$inc": {"usage_frequency": 1},
                         "$push": {
                             "performance_history": {
-                                "timestamp": datetime.utcnow(),
+                                "timestamp": datetime.now(timezone.utc),
                                 "quality_score": quality_score,
                                 "selection_score": technique_score.final_score
                             }
                         },
                         "$set": {
-                            "last_used": datetime.utcnow(),
+                            "last_used": datetime.now(timezone.utc),
                             # Update rolling average performance
                             "performance_score": quality_score  # Could be more sophisticated
                         }
                     }
                 )
+                
+                # Keep the in-process view in sync with the stored score
+                cached = self._technique_cache.get(technique_score.technique_id)
+                if cached is not None:
+                    self._technique_cache[technique_score.technique_id] = replace(cached, performance_score=quality_score)
         except Exception as e:
             logger.error(f"💥 Technique metrics update failed: {e}")
@@ -1,46 +1,65 @@
 #!/usr/bin/env python3
 import os, re, ast, json, textwrap
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
 
 ROOT = Path("BRAIN_ENGINE")
+MAX_FILE_BYTES = 1_000_000  # skip huge files so one of them can't dominate the tail
 
-def read_first_comment_block(text: str):
+_TAG_MAP = {
+    "router": "router",
+    "registry": "registry",
+    "pipeline": "pipeline",
+    "adapter": "adapter",
+    "feature": "feature-flags",
+    "flag": "feature-flags",
+    "error": "errors",
+    "util": "utils",
+    "config": "config",
+    "client": "client",
+    "schema": "schema",
+    "model": "model",
+    "service": "service",
+    "worker": "worker",
+    "task": "task",
+}
+# zero-width lookahead so overlapping keys (e.g. "routerror") are all found in one scan
+_TAG_RE = re.compile("(?=(" + "|".join(_TAG_MAP) + "))")
+
+def read_first_comment_block(text: str, tree=None):
     # grab top comment/docstring chunk
-    # python: module docstring; others: leading // or /* */ block
-    # try python first
-    try:
-        mod = ast.parse(text)
-        ds = ast.get_docstring(mod)
+    # python: module docstring (from the already-parsed tree); others: leading // or /* */ block
+    if tree is not None:
+        ds = ast.get_docstring(tree)
         if ds: return ds.strip()
-    except Exception:
-        pass
     # fallback: leading comment lines
     lines = text.splitlines()
     block = []
-    for i, line in enumerate(lines[:60]):
-        if re.match(r'^\s*(#|//|/\*|\*)', line):
-            block.append(line.strip("/*# /"))
+    for line in lines[:60]:
+        ls = line.lstrip()
+        if ls.startswith(('#', '//', '/*', '*')):
+            block.append(ls.strip("/*# "))
         elif block:
             break
     return "\n".join(block).strip() if block else ""
 
-def list_py_symbols(text: str):
+def _symbol(node):
+    return {"name": node.name, "doc": (ast.get_docstring(node) or "").strip()}
+
+def list_py_symbols(tree: ast.Module):
     out = {"classes": [], "functions": []}
-    try:
-        tree = ast.parse(text)
-        for node in ast.walk(tree):
-            if isinstance(node, ast.ClassDef):
-                out["classes"].append({
-                    "name": node.name,
-                    "doc": (ast.get_docstring(node) or "").strip()
-                })
-            elif isinstance(node, ast.FunctionDef):
-                out["functions"].append({
-                    "name": node.name,
-                    "doc": (ast.get_docstring(node) or "").strip()
-                })
-    except Exception:
-        pass
+    # only module level + class bodies (methods); no need to walk every expression node
+    class_bodies = []
+    for node in tree.body:
+        if isinstance(node, ast.ClassDef):
+            out["classes"].append(_symbol(node))
+            class_bodies.append(node.body)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            out["functions"].append(_symbol(node))
+    for body in class_bodies:
+        for sub in body:
+            if isinstance(sub, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                out["functions"].append(_symbol(sub))
     return out
 
 def detect_lang(path: Path):
@@ -57,36 +76,25 @@ def summarize_file(path: Path):
     except Exception:
         return None
     lang = detect_lang(path)
-    header = read_first_comment_block(text)
-    symbols = list_py_symbols(text) if lang == "python" else {"classes": [], "functions": []}
+    # parse once, shared by the header and symbol extraction
+    tree = None
+    if lang == "python":
+        try:
+            tree = ast.parse(text)
+        except Exception:
+            pass
+    header = read_first_comment_block(text, tree)
+    symbols = list_py_symbols(tree) if tree is not None else {"classes": [], "functions": []}
     # quick heuristics: pipeline/registry/adapter/feature/route words
-    tags = []
     name = path.name.lower()
-    for key, tag in [
-        ("router", "router"),
-        ("registry", "registry"),
-        ("pipeline", "pipeline"),
-        ("adapter", "adapter"),
-        ("feature", "feature-flags"),
-        ("flag", "feature-flags"),
-        ("error", "errors"),
-        ("util", "utils"),
-        ("config", "config"),
-        ("client", "client"),
-        ("schema", "schema"),
-        ("model", "model"),
-        ("service", "service"),
-        ("worker", "worker"),
-        ("task", "task"),
-    ]:
-        if key in name: tags.append(tag)
+    tags = {_TAG_MAP[m] for m in _TAG_RE.findall(name)}
     return {
         "path": str(path),
         "lang": lang,
         "comment_header": header,
         "classes": symbols["classes"],
         "functions": symbols["functions"],
-        "tags": sorted(set(tags)),
+        "tags": sorted(tags),
         "lines": text.count("\n")+1
     }
 
@@ -98,11 +106,14 @@ def main():
     for p in ROOT.rglob("*"):
         if p.is_file():
             if p.suffix.lower() in {".py", ".ts", ".tsx", ".js", ".jsx", ".json", ".yml", ".yaml", ".toml", ".md"}:
-                files.append(p)
-    records = []
-    for f in sorted(files):
-        rec = summarize_file(f)
-        if rec: records.append(rec)
+                if p.stat().st_size <= MAX_FILE_BYTES:
+                    files.append(p)
+    files.sort()
+    # AST parsing is CPU-bound, so fan out across processes (summarize_file stays top-level/picklable)
+    workers = os.cpu_count() or 1
+    chunksize = max(1, len(files) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        records = [rec for rec in ex.map(summarize_file, files, chunksize=chunksize) if rec]
 
     out = ["# BRAIN_ENGINE – File Inventory\n"]
     out.append(f"Total files: **{len(records)}**\n")
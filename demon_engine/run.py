@@ -4,7 +4,6 @@ Launch the Demon Engine with all the bells and whistles
 Sets up environment, initializes database, and starts the API
 """
 
-import asyncio
 import os
 import sys
 import logging
@@ -16,6 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from demon_engine.api import app
 from demon_engine.core import DemonEngineBrain
 from demon_engine.schemas import DemonEngineConfig
+from motor.motor_asyncio import AsyncIOMotorClient
 import uvicorn
 
 # Configure logging
@@ -51,6 +51,24 @@ def check_environment():
     
     logger.info("✅ Environment variables are set")
 
+def select_event_loop() -> str:
+    """⚡ Use uvloop where it is supported and installed, else the stdlib loop"""
+    if sys.platform == 'win32':
+        return "asyncio"
+    try:
+        import uvloop  # noqa: F401
+        return "uvloop"
+    except ImportError:
+        return "asyncio"
+
+def select_http_impl() -> str:
+    """⚡ Use the httptools parser when installed"""
+    try:
+        import httptools  # noqa: F401
+        return "httptools"
+    except ImportError:
+        return "auto"
+
 def print_banner():
     """🎭 Print the epic Demon Engine banner"""
     banner = """
@@ -67,7 +85,13 @@ def print_banner():
     """
     print(banner)
 
-async def main():
+def build_brain() -> DemonEngineBrain:
+    """🧠 Construct the brain eagerly so model loading happens before serving"""
+    client = AsyncIOMotorClient(os.getenv('MONGODB_URI'))
+    db = client.get_default_database(os.getenv('MONGODB_DB', 'demon_engine'))
+    return DemonEngineBrain(DemonEngineConfig(), db)
+
+def main():
     """🚀 Main startup function"""
     print_banner()
     
@@ -78,24 +102,39 @@ async def main():
     host = os.getenv('API_HOST', '0.0.0.0')
     port = int(os.getenv('API_PORT', 8000))
     reload = os.getenv('API_RELOAD', 'true').lower() == 'true'
+    workers = int(os.getenv('API_WORKERS', '1'))
+    
+    # Reload/multi-worker modes import the app in child processes, so only a
+    # single in-process server can reuse a brain built here
+    in_process = not reload and workers == 1
+    if in_process:
+        brain = build_brain()
+        app.state.brain = brain
+        # Mongo pool + technique cache are loop-bound: warm them (and the embedding model) in the server loop before it accepts traffic
+        app.add_event_handler("startup", brain.warmup)
+        # Stop the batch encoder and release any queries still waiting on it
+        app.add_event_handler("shutdown", brain.close)
     
     logger.info(f"🚀 Starting Demon Engine API on {host}:{port}")
     logger.info(f"📚 API Documentation: http://{host if host != '0.0.0.0' else 'localhost'}:{port}/docs")
     logger.info(f"🏥 Health Check: http://{host if host != '0.0.0.0' else 'localhost'}:{port}/health")
     
-    # Start the server
+    # Start the server (uvloop/httptools when available; no per-request access log)
     uvicorn.run(
-        "demon_engine.api:app",
+        app if in_process else "demon_engine.api:app",
         host=host,
         port=port,
         reload=reload,
-        log_level="info",
-        access_log=True
+        loop=select_event_loop(),
+        http=select_http_impl(),
+        access_log=False,
+        log_level="warning",
+        workers=workers
     )
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        main()
     except KeyboardInterrupt:
         logger.info("🛑 Demon Engine shutting down gracefully...")
     except Exception as e:
@@ -1,10 +1,30 @@
 # 👹 DEMON ENGINE SCHEMAS - The Knowledge Core Architecture
 # Where 230 techniques become an unstoppable prompt orchestration system
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any, Union
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
+from dataclasses import dataclass, field
+from typing import List, Optional, Dict, Any, Union, FrozenSet, Tuple
+from datetime import datetime, timezone
 from enum import Enum
+import secrets
+import time
+from sys import intern
+import numpy as np
+
+# ⏱️ Coarse UTC clock - timestamps only need ms precision, so reuse one datetime
+# per millisecond instead of allocating a fresh one for every model instance
+_CLOCK_RESOLUTION_NS = 1_000_000
+_clock_state = [0, datetime.now(timezone.utc)]
+
+def utc_now() -> datetime:
+    now_ns = time.monotonic_ns()
+    if now_ns - _clock_state[0] >= _CLOCK_RESOLUTION_NS:
+        _clock_state[0] = now_ns
+        _clock_state[1] = datetime.now(timezone.utc)
+    return _clock_state[1]
+
+def new_pipeline_id() -> str:
+    return f"pipe_{secrets.token_hex(8)}"
 
 class DifficultyLevel(str, Enum):
     BEGINNER = "beginner"
@@ -27,6 +47,8 @@ class CategoryType(str, Enum):
 
 # 🧬 Core Technique Schema (mirrors compendium.json but enhanced)
 class TechniqueCore(BaseModel):
+    model_config = ConfigDict(defer_build=True, extra='ignore')  # also hydrated from Mongo documents (_id etc.)
+    
     id: str
     name: str
     category: CategoryType
@@ -49,17 +71,57 @@ class TechniqueCore(BaseModel):
     usage_frequency: int = Field(default=0, description="How often this technique is used")
     success_rate: float = Field(default=0.8, ge=0.0, le=1.0)
     
-    # Vector embeddings (stored in MongoDB)
-    description_embedding: Optional[List[float]] = None
-    metadata_embedding: Optional[List[float]] = None
+    # Vector embeddings live in MongoDB (for $vectorSearch) and in EmbeddingStore,
+    # never on the model - extra='ignore' drops them when hydrating from documents
     
     # Timestamps
-    created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
+    updated_at: datetime = Field(default_factory=utc_now)
     last_used: Optional[datetime] = None
 
+# ⚡ Hot-path view of a technique (slot-backed, immutable, no validation overhead)
+@dataclass(slots=True, frozen=True)
+class TechniqueView:
+    id: str
+    name: str
+    description: str
+    category: CategoryType
+    difficulty: DifficultyLevel
+    estimated_tokens: int
+    performance_score: float
+    tags: FrozenSet[str]
+    aliases: FrozenSet[str]
+    conflicts_with: FrozenSet[str]
+    complementary_techniques: FrozenSet[str]
+    keyword_set: FrozenSet[str]
+    template: Optional[str] = None
+    example: Optional[str] = None
+
+    @classmethod
+    def from_core(cls, technique: TechniqueCore) -> "TechniqueView":
+        # IDs/tags repeat across the whole catalogue and key the caches - intern them
+        # so they share one object and dict/set lookups hit the identity fast path
+        return cls(
+            id=intern(technique.id),
+            name=technique.name,
+            description=technique.description,
+            category=technique.category,
+            difficulty=technique.difficulty,
+            estimated_tokens=technique.estimated_tokens,
+            performance_score=technique.performance_score,
+            tags=frozenset(map(intern, technique.tags)),
+            aliases=frozenset(map(intern, technique.aliases)),
+            conflicts_with=frozenset(map(intern, technique.conflicts_with)),
+            complementary_techniques=frozenset(map(intern, technique.complementary_techniques)),
+            keyword_set=frozenset(map(intern, technique.retrieval_metadata.get('keywords', []))),
+            template="\n".join(technique.template_fragments) or None,
+            example=technique.examples[0] if technique.examples else None
+        )
+
 # 🎯 Query Analysis Schema
 class QueryAnalysis(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+    
     raw_query: str
     cleaned_query: str
     intent_type: str  # "brainstorm", "code", "analysis", "creative", etc.
@@ -75,29 +137,169 @@ class QueryAnalysis(BaseModel):
     
     # Analysis metadata
     confidence_score: float = Field(ge=0.0, le=1.0)
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
+    
+    # Whitespace tokens of cleaned_query, computed once for overlap checks
+    _query_token_set: Optional[FrozenSet[str]] = PrivateAttr(default=None)
+    
+    @property
+    def query_token_set(self) -> FrozenSet[str]:
+        if self._query_token_set is None:
+            self._query_token_set = frozenset(self.cleaned_query.split())
+        return self._query_token_set
 
 # 🧪 Technique Selection & Scoring
-class TechniqueScore(BaseModel):
+# Built per candidate on every request - plain slot dataclasses, no validation overhead
+@dataclass(slots=True)
+class TechniqueScore:
     technique_id: str
     technique_name: str
-    semantic_score: float = Field(ge=0.0, le=1.0, description="Vector similarity score")
-    signal_boost: float = Field(default=0.0, description="Keyword/command match boost")
-    penalty_score: float = Field(default=0.0, description="Negative scoring for conflicts")
-    complementary_boost: float = Field(default=0.0, description="Synergy with other techniques")
-    final_score: float = Field(ge=0.0, le=1.0)
+    semantic_score: float  # Vector similarity score
+    final_score: float
     selection_reason: str
-    
-class TechniquePipeline(BaseModel):
-    pipeline_id: str = Field(default_factory=lambda: f"pipe_{datetime.utcnow().timestamp()}")
+    signal_boost: float = 0.0  # Keyword/command match boost
+    penalty_score: float = 0.0  # Negative scoring for conflicts
+    complementary_boost: float = 0.0  # Synergy with other techniques
+
+@dataclass(slots=True)
+class TechniquePipeline:
     techniques: List[TechniqueScore]
-    execution_order: List[str]  # technique IDs in order
+    execution_order: List[int]  # indices into techniques, in execution order
     estimated_total_tokens: int
-    confidence_score: float = Field(ge=0.0, le=1.0)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    confidence_score: float
+    pipeline_id: str = field(default_factory=new_pipeline_id)
+    created_at: datetime = field(default_factory=utc_now)
+
+# 📐 Structure-of-arrays view over candidate scores - one contiguous array per score
+# component so aggregation and top-k ranking are single vectorized NumPy ops
+@dataclass(slots=True)
+class TechniquePipelineSoA:
+    technique_ids: List[str]
+    semantic: np.ndarray
+    signal_boost: np.ndarray
+    penalty: np.ndarray
+    complementary: np.ndarray
+    final: np.ndarray
+
+    @classmethod
+    def from_scores(cls, scores: List[TechniqueScore]) -> "TechniquePipelineSoA":
+        return cls(
+            technique_ids=[s.technique_id for s in scores],
+            semantic=np.fromiter((s.semantic_score for s in scores), dtype=np.float64, count=len(scores)),
+            signal_boost=np.fromiter((s.signal_boost for s in scores), dtype=np.float64, count=len(scores)),
+            penalty=np.fromiter((s.penalty_score for s in scores), dtype=np.float64, count=len(scores)),
+            complementary=np.fromiter((s.complementary_boost for s in scores), dtype=np.float64, count=len(scores)),
+            final=np.fromiter((s.final_score for s in scores), dtype=np.float64, count=len(scores))
+        )
+
+    @classmethod
+    def from_components(cls, technique_ids: List[str], semantic: List[float],
+                        signal_boost: List[float], penalty: List[float]) -> "TechniquePipelineSoA":
+        """Build straight from per-candidate score components (final is left to aggregate())"""
+        n = len(technique_ids)
+        return cls(
+            technique_ids=technique_ids,
+            semantic=np.array(semantic, dtype=np.float64),
+            signal_boost=np.array(signal_boost, dtype=np.float64),
+            penalty=np.array(penalty, dtype=np.float64),
+            complementary=np.zeros(n, dtype=np.float64),
+            final=np.zeros(n, dtype=np.float64)
+        )
+
+    def aggregate(self) -> np.ndarray:
+        """Recompute final scores for every candidate in one pass"""
+        self.final = np.clip(self.semantic + self.signal_boost - self.penalty + self.complementary, 0.0, 1.0)
+        return self.final
+
+    def top_k(self, k: int, min_score: Optional[float] = None) -> np.ndarray:
+        """Indices of the k best candidates scoring above min_score, best first (ties keep input order)"""
+        idx = np.arange(len(self.final)) if min_score is None else np.flatnonzero(self.final > min_score)
+        vals = self.final[idx]
+        if len(idx) > k:
+            # kth best value splits "definitely in" from boundary ties; earliest ties win like a stable sort
+            kth = -np.partition(-vals, k - 1)[k - 1]
+            above = np.flatnonzero(vals > kth)
+            ties = np.flatnonzero(vals == kth)[:k - len(above)]
+            keep = np.sort(np.concatenate((above, ties)))
+            idx, vals = idx[keep], vals[keep]
+        return idx[np.argsort(-vals, kind="stable")]
+
+# 🧮 Technique embeddings kept out of the models: one (N, D) float32 matrix with
+# L2-normalized rows, so scoring every technique is a single matrix-vector product.
+# A per-row int8 copy (symmetric, scale = max|v| / 127) does the candidate pass at a
+# quarter of the memory traffic; the float32 rows only rerank the shortlist.
+@dataclass(slots=True)
+class EmbeddingStore:
+    ids: List[str] = field(default_factory=list)
+    desc_mat: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.float32))
+    meta_mat: Optional[np.ndarray] = None
+    desc_mat_i8: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.int8))
+    scale: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float32))
+
+    RERANK_FACTOR = 4  # int8 shortlist size as a multiple of k
+
+    @staticmethod
+    def _normalize(vectors: Any) -> np.ndarray:
+        mat = np.array(vectors, dtype=np.float32, ndmin=2)
+        norms = np.linalg.norm(mat, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return mat / norms
+
+    @staticmethod
+    def _quantize(mat: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        scale = np.abs(mat).max(axis=1) / 127.0
+        scale[scale == 0] = 1.0
+        return np.round(mat / scale[:, None]).astype(np.int8), scale.astype(np.float32)
+
+    @classmethod
+    def from_vectors(cls, ids: List[str], desc_vectors: Any, meta_vectors: Any = None) -> "EmbeddingStore":
+        desc_mat = cls._normalize(desc_vectors)
+        desc_mat_i8, scale = cls._quantize(desc_mat)
+        return cls(
+            ids=[intern(i) for i in ids],
+            desc_mat=desc_mat,
+            meta_mat=cls._normalize(meta_vectors) if meta_vectors is not None else None,
+            desc_mat_i8=desc_mat_i8,
+            scale=scale
+        )
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def cosine(self, query_vec: Any) -> np.ndarray:
+        """Cosine similarity of the query against every technique description"""
+        return self.desc_mat @ self._normalize(query_vec)[0]
+
+    def approx_cosine(self, query_vec: Any) -> np.ndarray:
+        """int8 x int8 -> int32 dot products, rescaled; close to cosine() for ranking"""
+        q_i8, q_scale = self._quantize(self._normalize(query_vec))
+        dots = np.matmul(self.desc_mat_i8, q_i8[0], dtype=np.int32)
+        return dots * (self.scale * q_scale[0])
+
+    def search(self, query_vec: Any, k: int) -> List[Dict[str, Any]]:
+        """Top-k techniques as {"id", "semantic_score"}, scored like Atlas cosine vectorSearchScore"""
+        q = self._normalize(query_vec)[0]
+        shortlist_size = k * self.RERANK_FACTOR
+        if len(self.ids) > shortlist_size:
+            # int8 candidate pass, then exact float32 cosine on the shortlist only
+            shortlist = np.argpartition(-self.approx_cosine(q), shortlist_size - 1)[:shortlist_size]
+            shortlist.sort()
+            sims = self.desc_mat[shortlist] @ q
+        else:
+            shortlist = np.arange(len(self.ids))
+            sims = self.desc_mat @ q
+        if len(sims) > k:
+            top = np.argpartition(-sims, k - 1)[:k]
+            top = top[np.argsort(-sims[top], kind="stable")]
+        else:
+            top = np.argsort(-sims, kind="stable")
+        scores = (1.0 + sims[top].astype(np.float64)) / 2.0
+        return [{"id": self.ids[i], "semantic_score": score} for i, score in zip(shortlist[top].tolist(), scores.tolist())]
 
 # 🔮 Execution Results & Feedback
 class ExecutionResult(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+    
     pipeline_id: str
     query_analysis: QueryAnalysis
     pipeline_used: TechniquePipeline
@@ -127,11 +329,13 @@ class ExecutionResult(BaseModel):
     user_abandoned: bool = False
     
     # Timestamps
-    executed_at: datetime = Field(default_factory=datetime.utcnow)
+    executed_at: datetime = Field(default_factory=utc_now)
     feedback_at: Optional[datetime] = None
 
 # 🧠 Self-Learning Analytics
 class LearningInsight(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+    
     insight_type: str  # "technique_performance", "pipeline_optimization", "user_pattern"
     insight_data: Dict[str, Any]
     confidence: float = Field(ge=0.0, le=1.0)
@@ -139,26 +343,30 @@ class LearningInsight(BaseModel):
     auto_applied: bool = False
     human_review_required: bool = False
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = Field(default_factory=utc_now)
     applied_at: Optional[datetime] = None
 
 # 🎭 Explainability Layer
-class ExplainabilityLog(BaseModel):
+@dataclass(slots=True)
+class ExplainabilityLog:
     pipeline_id: str
-    reasoning_steps: List[Dict[str, str]]  # [{"step": "technique_selection", "reason": "User asked for ideas → divergent_ideation"}]
-    technique_explanations: Dict[str, str]  # technique_id -> why it was chosen
-    pipeline_rationale: str
-    alternative_pipelines_considered: List[str] = []
-    confidence_breakdown: Dict[str, float]
+    query_analysis_summary: Dict[str, Any]
+    technique_explanations: List[Dict[str, Any]]  # [{"technique_name", "selection_reason", "score", "role", "contribution"}]
+    decision_rationale: str
+    quality_factors: Dict[str, float]
+    confidence_score: float
+    alternative_approaches: List[str] = field(default_factory=list)
     
     # Enterprise audit trail
-    compliance_notes: List[str] = []
+    compliance_notes: List[str] = field(default_factory=list)
     risk_assessment: str = "low"  # "low", "medium", "high"
     
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = field(default_factory=utc_now)
 
 # 🚀 API Request/Response Models
 class DemonEngineRequest(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+    
     query: str
     user_id: Optional[str] = None
     session_id: Optional[str] = None
@@ -173,6 +381,8 @@ class DemonEngineRequest(BaseModel):
     target_quality: float = Field(default=0.8, ge=0.5, le=1.0)
 
 class DemonEngineResponse(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+    
     success: bool
     output: str
     formatted_output: Optional[Dict[str, Any]] = None
@@ -191,7 +401,7 @@ class DemonEngineResponse(BaseModel):
     error_message: Optional[str] = None
     fallback_used: bool = False
     
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = Field(default_factory=utc_now)
 
 # 🔥 MongoDB Collection Names
 class MongoCollections:
@@ -204,6 +414,8 @@ class MongoCollections:
 
 # 💎 Configuration
 class DemonEngineConfig(BaseModel):
+    model_config = ConfigDict(defer_build=True)
+    
     # Vector search settings
     embedding_model: str = "text-embedding-3-small"
     vector_similarity_threshold: float = 0.7
@@ -1,14 +1,21 @@
+def _raw_text(result):
+    # Only looked up when a reshape is actually needed
+    return getattr(result, "raw", None) or getattr(result, "text", "")
 def _reshape_web_contract(result):
     # Enforce web contract: outline sections present
     sections = getattr(result, "sections", [])
+    ideas = getattr(result, "ideas", None)
+    if not sections and ideas:
+        # Oracle responses: one section per idea
+        sections = [{"title": idea.title, "body": idea.description} for idea in ideas]
     if not sections:
         # Try to split raw text into sections
-        raw = getattr(result, "raw", "") or getattr(result, "text", "")
-        lines = [l.strip() for l in raw.split("\n") if l.strip()]
-        # Group by empty line as section break
+        raw = _raw_text(result)
+        # Single pass: strip each line and group by empty line as section break
         grouped = []
         current = []
-        for l in lines:
+        for raw_line in raw.splitlines():
+            l = raw_line.strip()
             if not l:
                 if current:
                     grouped.append(current)
@@ -25,11 +32,11 @@ def _reshape_agent_contract(result):
     constraints = getattr(result, "constraints", [])
     stop_conditions = getattr(result, "stop_conditions", [])
     # If steps are not a list of numbered steps, try to split prose
-    if not steps or not all(isinstance(s, str) and s.strip().startswith(("1.", "2.", "3.")) for s in steps):
-        raw = getattr(result, "raw", "") or getattr(result, "text", "")
-        # Split into lines and number if needed
-        lines = [l.strip() for l in raw.split("\n") if l.strip()]
-        steps = [f"{i+1}. {l}" for i, l in enumerate(lines) if l]
+    if not steps or not all(isinstance(s, str) and _NUMBERED_STEP_RE.match(s) for s in steps):
+        raw = _raw_text(result)
+        # Split into lines and number if needed (strip once per line, skip blanks)
+        stripped = (raw_line.strip() for raw_line in raw.splitlines())
+        steps = [f"{i+1}. {l}" for i, l in enumerate(l for l in stripped if l)]
     return steps, constraints, stop_conditions
 
 """
@@ -43,11 +50,39 @@ from demon_engine.services.brain_engine.analytics import log_event, log_before_a
 
 # --- Pipeline Node: CodeForge.Architect.v1 (editor/pro/vscode) ---
 import asyncio
+import functools
+import re
+import time
+from services.architect_service import ArchitectService, ArchitectInput
+from services.oracle_service import OracleService, IdeaInput
 from demon_engine.services.brain_engine.errors import ProRequiredError
+from demon_engine.services.brain_engine.gating import gated
+
+def _noop(*args, **kwargs):
+    return None
+
+# --- Service singletons: built on first use, then reused so the LLM client's pool stays warm ---
+def _llm():
+    from dependencies import llm_provider
+    return llm_provider.get_langchain_chat()
+
+@functools.cache
+def _architect_service():
+    return ArchitectService(llm_instance=_llm())
+
+@functools.cache
+def _oracle_service():
+    return OracleService(llm_instance=_llm())
+
+_VERBS = ["Refactor", "Implement", "Add", "Remove", "Update", "Create", "Write", "Test", "Fix", "Configure", "Set", "Build", "Design", "Document", "Deploy", "Integrate", "Optimize", "Generate", "Review", "Analyze", "Plan"]
+# Prefix match like str.startswith (no word boundary): "Adds ..." / "Setup ..." still count
+_VERB_RE = re.compile(r"^\s*(?:" + "|".join(_VERBS) + ")")
+
+# Same as s.strip().startswith(("1.", "2.", "3.")) without allocating a stripped copy
+_NUMBERED_STEP_RE = re.compile(r"\s*[123]\.")
 
 def _is_verb(line):
-    verbs = ["Refactor", "Implement", "Add", "Remove", "Update", "Create", "Write", "Test", "Fix", "Configure", "Set", "Build", "Design", "Document", "Deploy", "Integrate", "Optimize", "Generate", "Review", "Analyze", "Plan"]
-    return any(line.strip().startswith(v) for v in verbs)
+    return _VERB_RE.match(line) is not None
 
 def _extract_imperative_lines(steps):
     return [s for s in steps if _is_verb(s)]
@@ -64,191 +99,122 @@ def _reshape_editor_contract(result):
     acceptance_criteria = _extract_acceptance_criteria(criteria) or _extract_acceptance_criteria(risks)
     return imperative_lines, acceptance_criteria
 
-async def run_architect_pro_pipeline(input_data, user, meta=None, timeout_ms=20000, pro_only=True, fallback_to=None, user_is_pro=False):
+async def _run_gated_service(pipeline, route_key, gate, input_data, meta, call, shape, timeout_ms, fallback_to,
+                             blocked=None):
     """
-    Pipeline node for CodeForge.Architect.v1 (editor/pro/vscode)
-    Calls ArchitectService.architect(input_text, meta) with timeout and fallback logic.
+    Shared try/telemetry/fallback scaffold for the gated Pro pipelines.
+    `call()` starts the service coroutine; `shape(result)` enforces the output contract and returns
+    (upgraded, plan, message, contract_fields, contract_breach).
     """
-    from services.architect_service import ArchitectService, ArchitectInput
-    from demon_engine.services.brain_engine.feature_flags import FeatureFlags
-    import time
-    service = ArchitectService(llm_instance=None)  # Inject real LLM in production
-    fallback = False
-    fallback_reason = None
-    plan = None
-    result = None
-    route_key = "editor/pro/vscode"
-    user_id = user.get("uid", "anon")
-    client = meta.get("client", "vscode") if meta else "vscode"
-    flags = FeatureFlags()
-    # --- Pro gating ---
-    if pro_only and not user_is_pro:
-        log_event("pipeline_error", {"pipeline": "CodeForge.Architect.v1", "user": user_id, "error": "Pro required"})
-        raise ProRequiredError("Pro required for this pipeline.")
-    # --- Kill-switch ---
-    if flags.is_killswitch(("editor", "pro", client)):
-        log_event("pipeline_error", {"pipeline": "CodeForge.Architect.v1", "user": user_id, "error": "killswitch"})
-        return {"output": None, "plan": None, "fallback": True, "fallback_reason": "killswitch"}
-    # --- Rate limiting ---
-    rl_key = f"CodeForge.Architect.v1/{client}/{user_id}"
-    if not flags.check_rate_limit(user_id, ("editor", "pro", client), "pro"):
-        log_event("pipeline_error", {"pipeline": "CodeForge.Architect.v1", "user": user_id, "error": "rate_limit_exceeded"})
-        return {"output": None, "plan": None, "fallback": True, "fallback_reason": "rate_limit_exceeded"}
-    # --- Telemetry toggle ---
-    telemetry_enabled = flags.is_telemetry_enabled()
-    t0 = time.time()
+    blocked = blocked or {"output": None, "plan": None, "fallback": True}
+    user_id = gate.user_id
+    telemetry_enabled = gate.telemetry_enabled
+    # Consent is fixed for the request: bind the logger (or a no-op) once
+    _lba = log_before_after if (meta and meta.get("log_before_after")) else _noop
+    t0 = time.perf_counter_ns()
     try:
-        coro = service.architect(ArchitectInput(**input_data), user_id=user_id)
-        result = await asyncio.wait_for(coro, timeout=timeout_ms/1000)
-        plan = result.steps if hasattr(result, "steps") else None
-        # --- Editor contract enforcement ---
-        contract_breach = False
-        imperative_lines, acceptance_criteria = _reshape_editor_contract(result)
-        if len(imperative_lines) < 3 or len(acceptance_criteria) < 3:
-            imperative_lines, acceptance_criteria = _reshape_editor_contract(result)
-            if len(imperative_lines) < 3 or len(acceptance_criteria) < 3:
-                contract_breach = True
-        latency = time.time() - t0
+        result = await asyncio.wait_for(call(), timeout=timeout_ms/1000)
+        upgraded, plan, message, contract_fields, contract_breach = shape(result)
+        latency_ns = time.perf_counter_ns() - t0
         fidelity_score = 0.95 if not contract_breach else 0.7  # TODO: make dynamic
+        fallback_reason = "contract_breach" if contract_breach else None
         explain = input_data.get("explain") or (meta and meta.get("explain"))
         response = {
-            "upgraded": f"Prompt:\n- " + "\n- ".join(imperative_lines) + "\n\nAcceptance criteria:\n- " + "\n- ".join(acceptance_criteria),
-            "matched_pipeline": "CodeForge.Architect.v1",
+            "upgraded": upgraded,
+            "matched_pipeline": pipeline,
             "engine_version": "2.0.0",
             "plan": plan or [],
             "diffs": None,
             "fidelity_score": fidelity_score,
             "matched_entries": [route_key],
-            "message": "Output contract: editor",
+            "message": message,
+            **contract_fields,
             "fallback": contract_breach,
-            "fallback_reason": "contract_breach" if contract_breach else None
+            "fallback_reason": fallback_reason
         }
         if explain:
             response["explain"] = {
                 "plan": plan or [],
                 "matched_entries": [route_key],
                 "fallback": contract_breach,
-                "fallback_reason": "contract_breach" if contract_breach else None
+                "fallback_reason": fallback_reason
             }
         if telemetry_enabled:
             log_event("route_selected", {
                 "route_key": route_key,
-                "latency": latency,
+                "latency_ns": latency_ns,
                 "retries": 0,
                 "fidelity_score": fidelity_score,
                 "extra": {
                     "fallback": contract_breach,
-                    "fallback_reason": "contract_breach" if contract_breach else None,
-                    "matched_pipeline": "CodeForge.Architect.v1"
+                    "fallback_reason": fallback_reason,
+                    "matched_pipeline": pipeline
                 }
             })
-        if meta and meta.get("log_before_after"):
-            log_before_after(before=input_data, after=response, consent=True, user_id=user_id)
-        return response
-# --- Pipeline Node: Agent.DemonEngine.v1 (agent/pro/cursor) ---
-async def run_agent_pro_pipeline(input_data, user, meta=None, timeout_ms=25000, pro_only=True, fallback_to=None, user_is_pro=False):
-    """
-    Pipeline node for Agent.DemonEngine.v1 (agent/pro/cursor)
-    Calls AgentService.agent(input_text, meta) with timeout and fallback logic.
-    Enforces agent contract: numbered steps, constraints, stop conditions.
-    """
-    from services.architect_service import ArchitectService, ArchitectInput  # Placeholder for AgentService
-    from demon_engine.services.brain_engine.feature_flags import FeatureFlags
-    import time
-    service = ArchitectService(llm_instance=None)  # Replace with AgentService in production
-    fallback = False
-    fallback_reason = None
-    plan = None
-    result = None
-    route_key = "agent/pro/cursor"
-    user_id = user.get("uid", "anon")
-    client = meta.get("client", "cursor") if meta else "cursor"
-    flags = FeatureFlags()
-    # --- Pro gating ---
-    if pro_only and not user_is_pro:
-        log_event("pipeline_error", {"pipeline": "Agent.DemonEngine.v1", "user": user_id, "error": "Pro required"})
-        raise ProRequiredError("Pro required for this pipeline.")
-    # --- Kill-switch ---
-    if flags.is_killswitch(("agent", "pro", client)):
-        log_event("pipeline_error", {"pipeline": "Agent.DemonEngine.v1", "user": user_id, "error": "killswitch"})
-        return {"output": None, "plan": None, "fallback": True, "fallback_reason": "killswitch"}
-    # --- Rate limiting ---
-    rl_key = f"Agent.DemonEngine.v1/{client}/{user_id}"
-    if not flags.check_rate_limit(user_id, ("agent", "pro", client), "pro"):
-        log_event("pipeline_error", {"pipeline": "Agent.DemonEngine.v1", "user": user_id, "error": "rate_limit_exceeded"})
-        return {"output": None, "plan": None, "fallback": True, "fallback_reason": "rate_limit_exceeded"}
-    # --- Telemetry toggle ---
-    telemetry_enabled = flags.is_telemetry_enabled()
-    t0 = time.time()
-    try:
-        # TODO: Replace with AgentService.agent call
-        coro = service.architect(ArchitectInput(**input_data), user_id=user_id)
-        result = await asyncio.wait_for(coro, timeout=timeout_ms/1000)
-        plan, constraints, stop_conditions = _reshape_agent_contract(result)
-        contract_breach = False
-        if not plan or len(plan) < 3:
-            contract_breach = True
-        latency = time.time() - t0
-        fidelity_score = 0.95 if not contract_breach else 0.7
-        explain = input_data.get("explain") or (meta and meta.get("explain"))
-        response = {
-            "upgraded": "\n".join(plan),
-            "matched_pipeline": "Agent.DemonEngine.v1",
-            "engine_version": "2.0.0",
-            "plan": plan or [],
-            "diffs": None,
-            "fidelity_score": fidelity_score,
-            "matched_entries": [route_key],
-            "message": "Output contract: agent",
-            "constraints": constraints,
-            "stop_conditions": stop_conditions,
-            "fallback": contract_breach,
-            "fallback_reason": "contract_breach" if contract_breach else None
-        }
-        if explain:
-            response["explain"] = {
-                "plan": plan or [],
-                "matched_entries": [route_key],
-                "fallback": contract_breach,
-                "fallback_reason": "contract_breach" if contract_breach else None
-            }
-        if telemetry_enabled:
-            log_event("route_selected", {
-                "route_key": route_key,
-                "latency": latency,
-                "retries": 0,
-                "fidelity_score": fidelity_score,
-                "extra": {
-                    "fallback": contract_breach,
-                    "fallback_reason": "contract_breach" if contract_breach else None,
-                    "matched_pipeline": "Agent.DemonEngine.v1"
-                }
-            })
-        if meta and meta.get("log_before_after"):
-            log_before_after(before=input_data, after=response, consent=True, user_id=user_id)
+        _lba(pipeline, input_data, response, consent=True, extra={"user_id": user_id})
         return response
     except ProRequiredError:
         if telemetry_enabled:
-            log_event("pipeline_error", {"pipeline": "Agent.DemonEngine.v1", "user": user_id, "error": "Pro required"})
+            log_event("pipeline_error", {"pipeline": pipeline, "user": user_id, "error": "Pro required"})
         raise
     except Exception as e:
         if telemetry_enabled:
-            log_event("pipeline_error", {"pipeline": "Agent.DemonEngine.v1", "user": user_id, "error": str(e)})
+            log_event("pipeline_error", {"pipeline": pipeline, "user": user_id, "error": str(e)})
         if fallback_to:
             # TODO: Actually resolve and call fallback pipeline node
-            return {"output": None, "plan": None, "fallback": True, "fallback_reason": "pipeline_error"}
-        return {"output": None, "plan": None, "fallback": True, "fallback_reason": str(e)}
-    except ProRequiredError:
-        if telemetry_enabled:
-            log_event("pipeline_error", {"pipeline": "CodeForge.Architect.v1", "user": user_id, "error": "Pro required"})
-        raise
-    except Exception as e:
-        if telemetry_enabled:
-            log_event("pipeline_error", {"pipeline": "CodeForge.Architect.v1", "user": user_id, "error": str(e)})
-        if fallback_to:
-            # TODO: Actually resolve and call fallback pipeline node
-            return {"output": None, "plan": None, "fallback": True, "fallback_reason": "pipeline_error"}
-        return {"output": None, "plan": None, "fallback": True, "fallback_reason": str(e)}
+            return {**blocked, "fallback_reason": "pipeline_error"}
+        return {**blocked, "fallback_reason": str(e)}
+
+def _shape_editor(result):
+    plan = result.steps if hasattr(result, "steps") else None
+    # --- Editor contract enforcement ---
+    imperative_lines, acceptance_criteria = _reshape_editor_contract(result)
+    contract_breach = len(imperative_lines) < 3 or len(acceptance_criteria) < 3
+    upgraded = f"Prompt:\n- " + "\n- ".join(imperative_lines) + "\n\nAcceptance criteria:\n- " + "\n- ".join(acceptance_criteria)
+    return upgraded, plan, "Output contract: editor", {}, contract_breach
+
+def _shape_agent(result):
+    plan, constraints, stop_conditions = _reshape_agent_contract(result)
+    contract_breach = not plan or len(plan) < 3
+    contract_fields = {"constraints": constraints, "stop_conditions": stop_conditions}
+    return "\n".join(plan), plan, "Output contract: agent", contract_fields, contract_breach
+
+def _shape_web(result):
+    sections = _reshape_web_contract(result)
+    contract_breach = not sections
+    upgraded = "\n\n".join([f"{s['title']}\n{s['body']}" for s in sections])
+    return upgraded, [s["title"] for s in sections], "Output contract: web", {"sections": sections}, contract_breach
+
+@gated("CodeForge.Architect.v1", ("editor", "pro"), client_default="vscode")
+async def run_architect_pro_pipeline(input_data, user, meta=None, timeout_ms=20000, fallback_to=None, *, gate):
+    """
+    Pipeline node for CodeForge.Architect.v1 (editor/pro/vscode)
+    Calls ArchitectService.architect(input_text, meta) with timeout and fallback logic.
+    Pro/kill-switch/rate-limit gating runs in @gated before this body.
+    """
+    service = _architect_service()
+    return await _run_gated_service(
+        "CodeForge.Architect.v1", "editor/pro/vscode", gate, input_data, meta,
+        lambda: service.architect(ArchitectInput(**input_data), user_id=gate.user_id),
+        _shape_editor, timeout_ms, fallback_to
+    )
+# --- Pipeline Node: Agent.DemonEngine.v1 (agent/pro/cursor) ---
+@gated("Agent.DemonEngine.v1", ("agent", "pro"), client_default="cursor")
+async def run_agent_pro_pipeline(input_data, user, meta=None, timeout_ms=25000, fallback_to=None, *, gate):
+    """
+    Pipeline node for Agent.DemonEngine.v1 (agent/pro/cursor)
+    Calls AgentService.agent(input_text, meta) with timeout and fallback logic.
+    Enforces agent contract: numbered steps, constraints, stop conditions.
+    Pro/kill-switch/rate-limit gating runs in @gated before this body.
+    """
+    # ArchitectService/ArchitectInput are placeholders for AgentService
+    service = _architect_service()  # Replace with AgentService in production
+    # TODO: Replace with AgentService.agent call
+    return await _run_gated_service(
+        "Agent.DemonEngine.v1", "agent/pro/cursor", gate, input_data, meta,
+        lambda: service.architect(ArchitectInput(**input_data), user_id=gate.user_id),
+        _shape_agent, timeout_ms, fallback_to
+    )
 
 # --- Pipeline Node: Oracle.Ideas.Basic/Pro.v1 (chat/free/web, chat/pro/web) ---
 async def run_oracle_pipeline(input_data, user, meta=None, timeout_ms=12000, pro_mode=False):
@@ -256,14 +222,12 @@ async def run_oracle_pipeline(input_data, user, meta=None, timeout_ms=12000, pro
     Pipeline node for Oracle.Ideas.Basic.v1 and Oracle.Ideas.Pro.v1
     Calls OracleService.generate_ideas(input_text, meta). For Pro, adds rerank/dedupe pass.
     """
-    from services.oracle_service import OracleService, IdeaInput
-    import time
-    service = OracleService(llm_instance=None)  # Inject real LLM in production
+    service = _oracle_service()
+    _lba = log_before_after if (meta and meta.get("log_before_after")) else _noop
     fallback = False
     fallback_reason = None
     result = None
     try:
-        start = time.time()
         coro = service.generate_ideas(IdeaInput(**input_data), user_id=user.get("uid", "anon"))
         result = await asyncio.wait_for(coro, timeout=timeout_ms/1000)
         ideas = result.ideas if hasattr(result, "ideas") else []
@@ -276,101 +240,26 @@ async def run_oracle_pipeline(input_data, user, meta=None, timeout_ms=12000, pro
             fallback = True
             fallback_reason = "quota_exceeded"
         log_event("pipeline_run", {"pipeline": "Oracle.Ideas.Pro.v1" if pro_mode else "Oracle.Ideas.Basic.v1", "user": user.get("uid"), "fallback": fallback, "reason": fallback_reason})
-        if meta and meta.get("log_before_after"):
-            log_before_after("oracle_pro", before=input_data, after=result, consent=True)
+        _lba("oracle_pro", input_data, result.dict(), consent=True, extra={"user_id": user.get("uid", "anon")})
         return {"output": result.dict(), "plan": [idea.title for idea in ideas], "fallback": fallback, "fallback_reason": fallback_reason}
     except Exception as e:
         log_event("pipeline_error", {"pipeline": "Oracle.Ideas.Pro.v1" if pro_mode else "Oracle.Ideas.Basic.v1", "user": user.get("uid"), "error": str(e)})
         return {"output": None, "plan": None, "fallback": True, "fallback_reason": str(e)}
 
 # Example: Oracle Pro Pipeline Adapter
-async def run_oracle_pro_pipeline(input_data, user, meta=None):
+@gated("CodeForge.Oracle.v1", ("oracle", "pro"), client_default="vscode",
+       blocked_response={"output": None, "fallback": True})
+async def run_oracle_pro_pipeline(input_data, user, meta=None, timeout_ms=15000, fallback_to=None, *, gate):
     """
     Adapter for chat/pro/web → Oracle.Ideas.Pro (Pro pipeline)
     - Calls OracleService.generate_ideas
     - Enforces Web/Chat contract (outline + bullets)
     - Logs telemetry and explainability
     """
-        from services.oracle_service import OracleService, OracleInput
-        from demon_engine.services.brain_engine.feature_flags import FeatureFlags
-        import time
-        service = OracleService(llm_instance=None)
-        fallback = False
-        fallback_reason = None
-        result = None
-        route_key = "oracle/pro/vscode"
-        user_id = user.get("uid", "anon")
-        client = meta.get("client", "vscode") if meta else "vscode"
-        flags = FeatureFlags()
-        # --- Pro gating ---
-        if pro_only and not user_is_pro:
-            log_event("pipeline_error", {"pipeline": "CodeForge.Oracle.v1", "user": user_id, "error": "Pro required"})
-            raise ProRequiredError("Pro required for this pipeline.")
-        # --- Kill-switch ---
-        if flags.is_killswitch(("oracle", "pro", client)):
-            log_event("pipeline_error", {"pipeline": "CodeForge.Oracle.v1", "user": user_id, "error": "killswitch"})
-            return {"output": None, "fallback": True, "fallback_reason": "killswitch"}
-        # --- Rate limiting ---
-        rl_key = f"CodeForge.Oracle.v1/{client}/{user_id}"
-        if not flags.check_rate_limit(user_id, ("oracle", "pro", client), "pro"):
-            log_event("pipeline_error", {"pipeline": "CodeForge.Oracle.v1", "user": user_id, "error": "rate_limit_exceeded"})
-            return {"output": None, "fallback": True, "fallback_reason": "rate_limit_exceeded"}
-        # --- Telemetry toggle ---
-        telemetry_enabled = flags.is_telemetry_enabled()
-        t0 = time.time()
-        try:
-            coro = service.oracle(OracleInput(**input_data), user_id=user_id)
-            result = await asyncio.wait_for(coro, timeout=timeout_ms/1000)
-            sections = _reshape_web_contract(result)
-            contract_breach = False
-            if not sections or len(sections) < 1:
-                contract_breach = True
-            latency = time.time() - t0
-            fidelity_score = 0.95 if not contract_breach else 0.7
-            explain = input_data.get("explain") or (meta and meta.get("explain"))
-            response = {
-                "upgraded": "\n\n".join([f"{s['title']}\n{s['body']}" for s in sections]),
-                "matched_pipeline": "CodeForge.Oracle.v1",
-                "engine_version": "2.0.0",
-                "plan": [s["title"] for s in sections],
-                "diffs": None,
-                "fidelity_score": fidelity_score,
-                "matched_entries": [route_key],
-                "message": "Output contract: web",
-                "sections": sections,
-                "fallback": contract_breach,
-                "fallback_reason": "contract_breach" if contract_breach else None
-            }
-            if explain:
-                response["explain"] = {
-                    "plan": [s["title"] for s in sections],
-                    "matched_entries": [route_key],
-                    "fallback": contract_breach,
-                    "fallback_reason": "contract_breach" if contract_breach else None
-                }
-            if telemetry_enabled:
-                log_event("route_selected", {
-                    "route_key": route_key,
-                    "latency": latency,
-                    "retries": 0,
-                    "fidelity_score": fidelity_score,
-                    "extra": {
-                        "fallback": contract_breach,
-                        "fallback_reason": "contract_breach" if contract_breach else None,
-                        "matched_pipeline": "CodeForge.Oracle.v1"
-                    }
-                })
-            if meta and meta.get("log_before_after"):
-                log_before_after(before=input_data, after=response, consent=True, user_id=user_id)
-            return response
-        except ProRequiredError:
-            if telemetry_enabled:
-                log_event("pipeline_error", {"pipeline": "CodeForge.Oracle.v1", "user": user_id, "error": "Pro required"})
-            raise
-        except Exception as e:
-            if telemetry_enabled:
-                log_event("pipeline_error", {"pipeline": "CodeForge.Oracle.v1", "user": user_id, "error": str(e)})
-            if fallback_to:
-                # TODO: Actually resolve and call fallback pipeline node
-                return {"output": None, "fallback": True, "fallback_reason": "pipeline_error"}
-            return {"output": None, "fallback": True, "fallback_reason": str(e)}
+    service = _oracle_service()
+    return await _run_gated_service(
+        "CodeForge.Oracle.v1", "oracle/pro/vscode", gate, input_data, meta,
+        lambda: service.generate_ideas(IdeaInput(**input_data), user_id=gate.user_id),
+        _shape_web, timeout_ms, fallback_to,
+        blocked={"output": None, "fallback": True}
+    )
@@ -2,48 +2,126 @@
 # demon_engine/services/brain_engine/analytics.py
 # =============================
 from __future__ import annotations
-import json, os, sys, time, threading
+import atexit, dataclasses, json, os, queue, sys, time, threading
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
+
+# orjson emits UTF-8 bytes directly and serializes datetimes/dataclasses natively
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+def _json_default(obj: Any) -> Any:
+    if isinstance(obj, datetime):
+        return obj.isoformat() + "Z"
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+if orjson is not None:
+    _ORJSON_OPTS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_DATACLASS
+
+    def _dumps(record: Dict[str, Any]) -> bytes:
+        return orjson.dumps(record, default=_json_default, option=_ORJSON_OPTS)
+else:
+    def _dumps(record: Dict[str, Any]) -> bytes:
+        return json.dumps(record, ensure_ascii=False, default=_json_default).encode("utf-8")
 
 __all__ = ["log_event", "log_before_after", "AnalyticsSink"]
 
+# Queue marker asking the writer to flush right after the records queued before it
+_FLUSH = object()
+
 class AnalyticsSink:
     """Thread-safe JSONL sink (stdout or file). Non-blocking best-effort.
+    Records are queued and written in batches by a daemon thread, so callers
+    never take a lock or flush on the request path. The file handle is a 1MB
+    buffer flushed on shutdown (or on request via write(..., flush=True)).
     Replace with your real backend (Kafka/Redis/ClickHouse) when ready.
     """
+    MAX_BATCH = 1024
+    BUFFER_BYTES = 1024 * 1024
+
     def __init__(self, path: Optional[str] = None):
         self.path = path or os.environ.get("DEMON_ANALYTICS_PATH")
-        self._lock = threading.Lock()
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
         self._fh = None
         if self.path:
             os.makedirs(os.path.dirname(self.path), exist_ok=True)
-            self._fh = open(self.path, "a", encoding="utf-8")
+            self._fh = open(self.path, "ab", buffering=self.BUFFER_BYTES)
+        self._writer = threading.Thread(target=self._drain_forever, name="analytics-sink", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def write(self, record: Dict[str, Any], flush: bool = False) -> None:
+        try:
+            record["ts"] = record.get("ts") or datetime.utcnow()
+            self._queue.put_nowait(_dumps(record) + b"\n")
+            if flush:
+                self._queue.put_nowait(_FLUSH)
+        except Exception:
+            # Never raise from analytics
+            pass
 
-    def write(self, record: Dict[str, Any]) -> None:
-        record["ts"] = record.get("ts") or datetime.utcnow().isoformat() + "Z"
-        line = json.dumps(record, ensure_ascii=False)
+    def _drain_forever(self) -> None:
+        while True:
+            # Block for the first item, then grab whatever else is already queued
+            item = self._queue.get()
+            batch: List[bytes] = []
+            flush = False
+            while item is not None:
+                if item is _FLUSH:
+                    flush = True
+                else:
+                    batch.append(item)
+                if len(batch) >= self.MAX_BATCH:
+                    break
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._write_batch(batch, flush or item is None)
+            if item is None:
+                return
+
+    def _write_batch(self, batch: List[bytes], flush: bool) -> None:
         try:
             if self._fh:
-                with self._lock:
-                    self._fh.write(line + "\n"); self._fh.flush()
-            else:
-                # stdout fallback
-                sys.stdout.write(line + "\n"); sys.stdout.flush()
+                self._fh.writelines(batch)
+                if flush:
+                    self._fh.flush()
+            elif batch:
+                # stdout fallback (interactive - always flushed)
+                sys.stdout.buffer.writelines(batch)
+                sys.stdout.buffer.flush()
         except Exception:
             # Never raise from analytics
             pass
 
+    def close(self) -> None:
+        """Drain pending records, flush, and stop the writer thread"""
+        if not self._writer.is_alive():
+            return
+        self._queue.put(None)
+        self._writer.join(timeout=5)
+        if self._fh:
+            try:
+                self._fh.close()
+            except Exception:
+                pass
+
 # Global sink
 _sink = AnalyticsSink()
 
-def log_event(name: str, data: Optional[Dict[str, Any]] = None) -> None:
+def log_event(name: str, data: Optional[Dict[str, Any]] = None, flush: bool = False) -> None:
+    """Queue an event; pass flush=True for durability-critical events."""
     rec = {
         "type": "event",
         "name": name,
         "data": data or {},
     }
-    _sink.write(rec)
+    _sink.write(rec, flush=flush)
 
 
 def log_before_after(name: str, before: Any, after: Any, consent: bool = False, extra: Optional[Dict[str, Any]] = None) -> None:
@@ -2,15 +2,72 @@
 # ==========================
 # services/brain_engine/compendium.py
 # ==========================
+import functools
 import json
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
 
-@dataclass
+# C JSON parser when installed; both accept bytes, so no decode step
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Shared empty default: missing lists normalize to this instead of a fresh [] per lookup
+_EMPTY: Tuple[str, ...] = ()
+
+@dataclass(slots=True, frozen=True)
+class MatchRule:
+    type: Optional[str]
+    any: Tuple[str, ...]            # original order
+    any_set: FrozenSet[str]
+    any_lower_set: FrozenSet[str]   # keyword rules: hits are one C-level intersection per request
+    gte: float
+
+    @classmethod
+    def from_raw(cls, rule: Dict[str, Any]) -> "MatchRule":
+        any_ = tuple(rule.get("any") or _EMPTY)
+        return cls(
+            type=rule.get("type"),
+            any=any_,
+            any_set=frozenset(any_),
+            any_lower_set=frozenset(k.lower() for k in any_),
+            gte=float(rule.get("gte", 0.6)),
+        )
+
+@dataclass(slots=True)
 class Technique:
     id: str
     raw: Dict[str, Any]
+    # Match metadata flattened once at load (the matcher reads these on every request)
+    aliases: Tuple[str, ...] = ()
+    rules: Tuple[MatchRule, ...] = ()
+    surfaces: FrozenSet[str] = frozenset()  # empty = any surface
+    tiers: FrozenSet[str] = frozenset()     # empty = any tier
+    cost: float = 1.0
+    conflicts: FrozenSet[str] = frozenset()
+    complements: Tuple[str, ...] = ()
+    phase: Tuple[str, ...] = ()
+    fragments: Any = field(default_factory=dict)
+
+    @classmethod
+    def from_raw(cls, raw: Dict[str, Any]) -> "Technique":
+        return cls(
+            id=raw["id"],
+            raw=raw,
+            aliases=tuple(raw.get("aliases") or _EMPTY),
+            rules=tuple(MatchRule.from_raw(r) for r in (raw.get("matcher_rules") or {}).get("signals") or _EMPTY),
+            surfaces=frozenset(raw.get("surfaces") or _EMPTY),
+            tiers=frozenset(raw.get("tiers") or _EMPTY),
+            cost=float((raw.get("cost_estimate") or {}).get("tokens", 1.0)),
+            conflicts=frozenset(raw.get("conflicts_with") or _EMPTY),
+            complements=tuple(raw.get("complements") or _EMPTY),
+            phase=tuple(raw.get("phase") or _EMPTY),
+            fragments=raw.get("template_fragments") or {},
+        )
+
     def get(self, k: str, d=None): return self.raw.get(k, d)
 
 class Compendium:
@@ -30,23 +87,30 @@ class Compendium:
         else:
             self.data = data
             
-        self.techniques: Dict[str, Technique] = {t["id"]: Technique(t["id"], t) for t in self.data.get("techniques", [])}
+        self.techniques: Dict[str, Technique] = {t["id"]: Technique.from_raw(t) for t in self.data.get("techniques", [])}
         self.defaults = self.data.get("defaults", {})
-        # PFCL map
-        self.pfcl_map: Dict[str, List[str]] = {}
+        # PFCL map (built as lists, frozen to tuples; look up with .get(cmd, _EMPTY))
+        pfcl_map: Dict[str, List[str]] = {}
         for cmd, spec in (self.data.get("pfcl", {}).get("commands", {})).items():
-            self.pfcl_map[cmd] = list(spec.get("maps_to") or [])
+            pfcl_map[cmd] = list(spec.get("maps_to") or _EMPTY)
         for t in self.techniques.values():
-            for a in (t.get("aliases") or []):
-                self.pfcl_map.setdefault(a, []).append(t.id)
+            for a in t.aliases:
+                pfcl_map.setdefault(a, []).append(t.id)
+        self.pfcl_map: Dict[str, Tuple[str, ...]] = {cmd: tuple(ids) for cmd, ids in pfcl_map.items()}
 
     @classmethod
     def from_path(cls, path: str | Path) -> "Compendium":
-        p = Path(path)
-        data = json.loads(p.read_text(encoding="utf-8"))
-        return cls(data)
+        # One stat per call; the parse is shared until the file changes on disk
+        p = Path(path).resolve()
+        return _load_compendium(str(p), p.stat().st_mtime_ns)
 
     def budget(self, tier: str) -> float:
         bt = (self.defaults.get("budget_tokens") or {})
         return float(bt.get(tier, bt.get("free", 1.0)))
 
+
+@functools.lru_cache(maxsize=8)
+def _load_compendium(path_str: str, mtime_ns: int) -> Compendium:
+    """Parse a compendium file once per (path, mtime); routers share the instance (treat as read-only)."""
+    data = _loads(Path(path_str).read_bytes())
+    return Compendium(data)
@@ -6,6 +6,16 @@
 import json
 from typing import Any, Dict, List
 
+# C JSON parser when installed (accepts str directly, no encode round trip)
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Insignificant whitespace per RFC 8259 (what the parsers themselves skip)
+_JSON_WS = " \t\n\r"
+
 class ContractError(Exception):
     pass
 
@@ -21,12 +31,14 @@ class Contracts:
         """
         if surface in ("vscode",):
             return {"edits": [], "text": raw_text}
-        # web/chrome default contract
-        try:
-            obj = json.loads(raw_text)
-            if isinstance(obj, dict):
-                return obj
-        except Exception:
-            pass
+        # web/chrome default contract; only a JSON object is accepted, so skip
+        # the parse (and its exception) unless the text opens like one
+        if raw_text.lstrip(_JSON_WS)[:1] == "{":
+            try:
+                obj = _loads(raw_text)
+                if isinstance(obj, dict):
+                    return obj
+            except Exception:
+                pass
         return {"sections": [{"title": "Response", "body": raw_text.strip()}]}
 
@@ -1,13 +1,21 @@
+import functools
+import logging
 import os
+from collections import OrderedDict
 
-# Toggle this to True for verbose debug output
+# Toggle this to True for verbose debug output (enables DEBUG on this module's logger)
 DEBUG_BRAIN_ENGINE = os.getenv("DEBUG_BRAIN_ENGINE", "0") in ("1", "true", "True")
 
+logger = logging.getLogger(__name__)
+if DEBUG_BRAIN_ENGINE:
+    logger.setLevel(logging.DEBUG)
+
 # ==========================
 # services/brain_engine/engine_v2.py
 # ==========================
 
 from demon_engine.services.brain_engine.llm_client import LLMClient
+from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 from .feature_flags import FeatureFlags
 from .errors import ProRequiredError, KillSwitchError, PipelineNotFound
@@ -18,8 +26,47 @@ from .matcher import TechniqueMatcher
 from .renderer import FragmentRenderer
 from .contracts import Contracts
 
+# Pipelines served by adapter nodes: pipeline_name -> (adapter function name, input_data key for the text, @gated Pro adapter?)
+_ADAPTER_ROUTES = {
+    **{name: ("run_architect_pro_pipeline", "description", True) for name in ("CodeForge.Architect", "ArchPro")},
+    **{name: ("run_oracle_pro_pipeline", "niche", True) for name in ("Oracle.Ideas.Pro", "IdeaGenPro")},
+    # Free tiers use the ungated Oracle node (Pro rate limits / kill-switch / telemetry don't apply)
+    **{name: ("run_oracle_pipeline", "niche", False) for name in ("Oracle.Ideas.Basic", "IdeaGenFree")},
+}
+# Resolved once at import; if the adapters can't be imported, only those pipelines fail (at dispatch time)
+try:
+    from demon_engine.services.brain_engine import adapters as _adapters
+    _ADAPTERS = {name: (getattr(_adapters, fn), key, is_gated) for name, (fn, key, is_gated) in _ADAPTER_ROUTES.items()}
+    _ADAPTER_IMPORT_ERROR: Optional[ImportError] = None
+except ImportError as e:
+    _ADAPTERS = {}
+    _ADAPTER_IMPORT_ERROR = e
+
+# Stateless pipeline components, shared by every router
+_PARSER = PFCLParser()
+_CONTRACTS = Contracts()
+
+@functools.lru_cache(maxsize=8)
+def _renderer_for(fragments_root: str) -> FragmentRenderer:
+    """One renderer (sandboxed Jinja env + template cache) per resolved fragments dir."""
+    return FragmentRenderer(fragments_root=fragments_root)
+
+@functools.lru_cache(maxsize=8)
+def _matcher_for(comp: Compendium) -> TechniqueMatcher:
+    """One matcher per Compendium instance (Compendium.from_path already shares those per file)."""
+    return TechniqueMatcher(comp)
+
+# Client surface -> inferred intent (everything else is chat)
+_CLIENT_INTENT = {"vscode": "editor", "cursor": "agent"}
+
+# meta fields forwarded to the fragment renderer (and therefore part of the plan cache key)
+_RENDER_META_KEYS = ("json_schema", "examples", "persona", "objective", "constraints", "n", "axes", "tools", "contexts")
+
 
 class DemonEngineRouter:
+    # Max (plan, final_prompt, messages) entries kept for repeat prompts
+    PLAN_CACHE_SIZE = 512
+
     def __init__(self,
                  registry: Optional[PipelineRegistry] = None,
                  features: Optional[FeatureFlags] = None,
@@ -27,15 +74,36 @@ class DemonEngineRouter:
         self.registry = registry or PipelineRegistry()
         self.features = features or FeatureFlags()
         self.comp = Compendium.from_path(compendium_path)
-        self.parser = PFCLParser()
-        self.matcher = TechniqueMatcher(self.comp)
-        self.renderer = FragmentRenderer(fragments_root="fragments")
-        self.contracts = Contracts()
+        self.parser = _PARSER
+        self.matcher = _matcher_for(self.comp)
+        self.renderer = _renderer_for(str(Path("fragments").resolve()))
+        self.contracts = _CONTRACTS
         # LLM client abstraction
         self.llm = LLMClient()
+        # LRU of parse+select+render results; parse/select/render are deterministic in the key
+        self._plan_cache: "OrderedDict[Tuple[Any, ...], Tuple[Dict[str, Any], str, list]]" = OrderedDict()
 
     def infer_intent(self, client: str) -> str:
-        return "chat" if client not in ("vscode", "cursor") else ("editor" if client=="vscode" else "agent")
+        return _CLIENT_INTENT.get(client, "chat")
+
+    def _plan(self, text: str, client: str, mode: str, meta_vals: Tuple[Any, ...], debug: bool) -> Tuple[Dict[str, Any], str, list]:
+        """PFCL parse -> technique select -> fragment render -> (plan, final_prompt, messages)"""
+        cmds, remainder = self.parser.parse(text)
+        if debug:
+            logger.debug("PFCL parse: cmds=%r remainder=%r", cmds, remainder)
+        plan = self.matcher.select(remainder, cmds, surface=client, tier=mode)
+        if debug:
+            logger.debug("technique plan: %r", plan)
+        rendered = self.renderer.render(plan, dict(zip(_RENDER_META_KEYS, meta_vals), prompt_text=remainder))
+        if debug:
+            logger.debug("rendered fragments: %r", rendered)
+        # naive final prompt assembly: system + developer + user
+        sys_s, dev_s, usr_s = rendered.get("system", ""), rendered.get("developer", ""), rendered.get("user", "")
+        final_prompt = "\n\n".join(p for p in (sys_s, dev_s, usr_s) if p).strip()
+        messages = []
+        if sys_s: messages.append({"role": "system", "content": sys_s})
+        if usr_s: messages.append({"role": "user", "content": usr_s})
+        return plan, final_prompt, messages
 
     async def route(self,
               text: str,
@@ -45,100 +113,75 @@ class DemonEngineRouter:
               meta: Optional[Dict[str, Any]] = None,
               user_is_pro: bool = False,
               allow_fallback: bool = True) -> Dict[str, Any]:
-        if DEBUG_BRAIN_ENGINE:
-            print("[BRAIN_ENGINE] route() called with:", {
-                "text": text,
-                "mode": mode,
-                "client": client,
-                "intent": intent,
-                "meta": meta,
-                "user_is_pro": user_is_pro,
-                "allow_fallback": allow_fallback
-            })
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("route() called with: text=%r mode=%s client=%s intent=%s meta=%r user_is_pro=%s allow_fallback=%s",
+                         text, mode, client, intent, meta, user_is_pro, allow_fallback)
         intent = intent or self.infer_intent(client)
         key = (intent, mode, client)
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] intent: {intent}, key: {key}")
         # pro gate / global flags / kill switch
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] Checking global pro disable: {self.features.is_global_pro_disabled()} and mode: {mode}")
+        if debug:
+            logger.debug("intent=%s key=%s global_pro_disabled=%s", intent, key, self.features.is_global_pro_disabled())
         if self.features.is_global_pro_disabled() and mode == "pro":
             if allow_fallback:
                 mode = "free"; key = (intent, mode, client)
             else:
                 raise ProRequiredError("Pro is globally disabled")
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] Checking killswitch for key: {key} => {self.features.is_killswitch(key)}")
         if self.features.is_killswitch(key):
             raise KillSwitchError(f"Pipeline {key} disabled")
         # registry lookup (legacy compatibility)
         try:
-            if DEBUG_BRAIN_ENGINE:
-                print(f"[BRAIN_ENGINE] Looking up pipeline for: {intent}, {mode}, {client}")
             pipeline_name, matched_key = self.registry.lookup(intent, mode, client)
         except KeyError:
             if allow_fallback:
-                if DEBUG_BRAIN_ENGINE:
-                    print("[BRAIN_ENGINE] Fallback to chat/free/* pipeline")
+                if debug:
+                    logger.debug("no pipeline for %s/%s/%s, falling back to chat/free/*", intent, mode, client)
                 pipeline_name, matched_key = self.registry.lookup("chat", "free", "*")
             else:
-                print(f"[BRAIN_ENGINE] PipelineNotFound: {intent}/{mode}/{client}")
                 raise PipelineNotFound(f"No pipeline for {intent}/{mode}/{client}")
 
+        m = meta or {}
         # --- NEW: Route to adapters for special pipelines ---
-        if pipeline_name in ("CodeForge.Architect", "ArchPro"):
-            from demon_engine.services.brain_engine.adapters import run_architect_pro_pipeline
+        adapter = _ADAPTERS.get(pipeline_name)
+        if adapter is not None:
+            fn, input_key, is_gated = adapter
             # input_data: build from text/meta as needed
-            input_data = {"description": text}
-            user = meta.get("user", {}) if meta else {}
-            meta_args = meta or {}
-            return await run_architect_pro_pipeline(input_data, user, meta_args)
-        elif pipeline_name in ("Oracle.Ideas.Pro", "Oracle.Ideas.Basic", "IdeaGenPro", "IdeaGenFree"):
-            from demon_engine.services.brain_engine.adapters import run_oracle_pro_pipeline
-            input_data = {"niche": text}
-            user = meta.get("user", {}) if meta else {}
-            meta_args = meta or {}
-            return await run_oracle_pro_pipeline(input_data, user, meta_args)
+            if is_gated:
+                return await fn({input_key: text}, m.get("user", {}), m, user_is_pro=user_is_pro)
+            return await fn({input_key: text}, m.get("user", {}), m)
+        if _ADAPTER_IMPORT_ERROR is not None and pipeline_name in _ADAPTER_ROUTES:
+            raise _ADAPTER_IMPORT_ERROR
 
         # --- Legacy path ---
-        cmds, remainder = self.parser.parse(text)
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] PFCL parse: cmds={cmds}, remainder={remainder}")
-        plan = self.matcher.select(remainder, cmds, surface=client, tier=mode)
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] Technique plan: {plan}")
-        rendered = self.renderer.render(plan, {
-            "prompt_text": remainder,
-            "json_schema": (meta or {}).get("json_schema"),
-            "examples": (meta or {}).get("examples"),
-            "persona": (meta or {}).get("persona"),
-            "objective": (meta or {}).get("objective"),
-            "constraints": (meta or {}).get("constraints"),
-            "n": (meta or {}).get("n"),
-            "axes": (meta or {}).get("axes"),
-            "tools": (meta or {}).get("tools"),
-            "contexts": (meta or {}).get("contexts"),
-        })
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] Rendered fragments: {rendered}")
-        # naive final prompt assembly: system + developer + user
-        final_prompt = "\n\n".join([rendered.get("system", ""), rendered.get("developer", ""), rendered.get("user", "")]).strip()
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] Final prompt: {final_prompt}")
-        messages = []
-        if rendered.get("system", ""): messages.append({"role": "system", "content": rendered["system"]})
-        if rendered.get("user", ""): messages.append({"role": "user", "content": rendered["user"]})
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] Messages to LLM: {messages}")
+        meta_vals = tuple(m.get(k) for k in _RENDER_META_KEYS)
+        # renderer generation: plans rendered before a reload_fragments() stop matching
+        cache_key: Optional[Tuple[Any, ...]] = (self.renderer.generation, text, mode, client, intent, meta_vals)
+        try:
+            cached = self._plan_cache.get(cache_key)
+        except TypeError:
+            # unhashable meta (e.g. a dict json_schema): plan this request uncached
+            cache_key = cached = None
+        if cached is not None:
+            self._plan_cache.move_to_end(cache_key)
+            plan, final_prompt, messages = cached
+            if debug:
+                logger.debug("plan cache hit: plan=%r", plan)
+        else:
+            plan, final_prompt, messages = self._plan(text, client, mode, meta_vals, debug)
+            # don't pin transient fragment failures
+            if cache_key is not None and "[RENDER_ERROR:" not in final_prompt:
+                self._plan_cache[cache_key] = (plan, final_prompt, messages)
+                if len(self._plan_cache) > self.PLAN_CACHE_SIZE:
+                    self._plan_cache.popitem(last=False)
+        if debug:
+            logger.debug("final prompt: %r messages: %r", final_prompt, messages)
         if not messages:
-            print("[BRAIN_ENGINE] ERROR: No messages to send to LLM. Check prompt assembly logic.")
+            logger.error("No messages to send to LLM. Check prompt assembly logic.")
             raise ValueError("No messages to send to LLM. Check prompt assembly logic.")
         llm_res = await self.llm.complete(messages=messages, tier=mode, meta={"intent": intent, "client": client})
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] LLM result: {llm_res.text}")
         shaped = self.contracts.enforce(client, mode, llm_res.text)
-        if DEBUG_BRAIN_ENGINE:
-            print(f"[BRAIN_ENGINE] Shaped/enforced output: {shaped}")
+        if debug:
+            logger.debug("LLM result: %r shaped: %r", llm_res.text, shaped)
         return {
             "matched_pipeline": pipeline_name,
             "matched_key": matched_key,
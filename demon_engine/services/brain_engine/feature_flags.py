@@ -4,9 +4,9 @@
 # demon_engine/services/brain_engine/feature_flags.py
 # =============================
 from __future__ import annotations
+import time
 from collections import deque
 from dataclasses import dataclass
-from datetime import datetime, timedelta
 from typing import Any, Dict, Tuple, Deque, Optional
 
 __all__ = ["FeatureFlags"]
@@ -28,7 +28,7 @@ class FeatureFlags:
         self._killswitch: set[Key] = set()
         self._pro_only: set[Key] = set()
         # rate window per (user_id, key or wildcard)
-        self._rate_limits: Dict[Tuple[str, Key], Deque[datetime]] = {}
+        self._rate_limits: Dict[Tuple[str, Key], Deque[float]] = {}
         self._default_rate_free = RateWindow(limit=30, seconds=60)   # 30/min
         self._default_rate_pro = RateWindow(limit=120, seconds=60)   # 120/min
 
@@ -72,10 +72,10 @@ class FeatureFlags:
         Sliding window per (user_id, key). Uses defaults per tier.
         """
         rw = self._default_rate_pro if mode == "pro" else self._default_rate_free
-        now = datetime.utcnow()
+        now = time.monotonic()
         dq = self._rate_limits.setdefault((user_id, key), deque())
-        # prune old
-        cutoff = now - timedelta(seconds=rw.seconds)
+        # prune old (monotonic seconds: immune to wall-clock jumps)
+        cutoff = now - rw.seconds
         while dq and dq[0] < cutoff:
             dq.popleft()
         if len(dq) >= rw.limit:
@@ -0,0 +1,57 @@
+# =============================
+# demon_engine/services/brain_engine/gating.py
+# =============================
+from __future__ import annotations
+import functools
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from demon_engine.services.brain_engine.analytics import log_event
+from demon_engine.services.brain_engine.errors import ProRequiredError
+from demon_engine.services.brain_engine.feature_flags import FeatureFlags
+
+__all__ = ["gated", "Gate", "FLAGS"]
+
+# Shared flags: one instance so kill-switches and rate-limit windows persist across requests
+FLAGS = FeatureFlags()
+
+@dataclass(slots=True)
+class Gate:
+    """What a gated pipeline needs from pre-flight: resolved caller + telemetry snapshot."""
+    user_id: str
+    client: str
+    telemetry_enabled: bool
+
+def gated(pipeline: str, route: Tuple[str, str], client_default: str,
+          blocked_response: Optional[Dict[str, Any]] = None) -> Callable:
+    """Run Pro check → kill-switch → rate-limit → telemetry toggle once, before the pipeline body.
+
+    The wrapped coroutine receives the resolved `gate` keyword; kill-switch and
+    rate-limit rejections return `blocked_response` with `fallback_reason` set.
+    """
+    intent, mode = route
+    blocked = blocked_response or {"output": None, "plan": None, "fallback": True}
+
+    def decorator(fn: Callable[..., Awaitable[Dict[str, Any]]]) -> Callable[..., Awaitable[Dict[str, Any]]]:
+        @functools.wraps(fn)
+        async def wrapper(input_data, user, meta=None, *args, pro_only=True, user_is_pro=False, **kwargs):
+            user_id = user.get("uid", "anon")
+            client = meta.get("client", client_default) if meta else client_default
+            # --- Pro gating ---
+            if pro_only and not user_is_pro:
+                log_event("pipeline_error", {"pipeline": pipeline, "user": user_id, "error": "Pro required"})
+                raise ProRequiredError("Pro required for this pipeline.")
+            key = (intent, mode, client)
+            # --- Kill-switch ---
+            if FLAGS.is_killswitch(key):
+                log_event("pipeline_error", {"pipeline": pipeline, "user": user_id, "error": "killswitch"})
+                return {**blocked, "fallback_reason": "killswitch"}
+            # --- Rate limiting ---
+            if not FLAGS.check_rate_limit(user_id, key, mode):
+                log_event("pipeline_error", {"pipeline": pipeline, "user": user_id, "error": "rate_limit_exceeded"})
+                return {**blocked, "fallback_reason": "rate_limit_exceeded"}
+            # --- Telemetry toggle ---
+            gate = Gate(user_id=user_id, client=client, telemetry_enabled=FLAGS.is_telemetry_enabled())
+            return await fn(input_data, user, meta, *args, gate=gate, **kwargs)
+        return wrapper
+    return decorator
@@ -2,19 +2,52 @@
 # ==========================
 # services/brain_engine/matcher.py
 # ==========================
+import functools
+import heapq
+import operator
 import re
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Tuple
+from typing import Any, Dict, FrozenSet, Iterator, List, NamedTuple, Tuple
 
-from demon_engine.services.brain_engine.compendium import Compendium, Technique
+from demon_engine.services.brain_engine.compendium import _EMPTY, Compendium, Technique
 from demon_engine.services.brain_engine.pfcl import PFCLCommand, PFCLParser
 
+_KEYWORD_RE = re.compile(r"[a-zA-Z][a-zA-Z0-9_\-]{2,}")
+_VAGUE_WORDS = ("maybe", "somehow", "something", "stuff", "thing", "probably", "kinda", "sort", "unsure")
+
+class Signals(NamedTuple):
+    keywords: FrozenSet[str]
+    ambiguity: float
+    len: int
+
+@functools.lru_cache(maxsize=1024)
+def _compute_signals(text: str) -> Signals:
+    """Prompt signals, memoized per text (retries/tests/A-B repeat prompts verbatim)."""
+    tl = text.lower()
+    kw = frozenset(_KEYWORD_RE.findall(tl))
+    q = tl.count("?"); v = sum(1 for w in _VAGUE_WORDS if w in tl)
+    L = len(text.strip())
+    amb = 0.0 if L <= 1 else min(1.0, (q * 0.25 + v * 0.15 + (1 if L < 80 else 0) * 0.2))
+    return Signals(keywords=kw, ambiguity=amb, len=L)
+
 @dataclass
 class MatchResult:
     id: str
     score: float
     why: Dict[str, Any] = field(default_factory=dict)
 
+_SCORE = operator.attrgetter("score")
+
+def _ranked(scored: Dict[str, MatchResult], pool_n: int) -> Iterator[MatchResult]:
+    """Results best-first (stable, like sorted(..., reverse=True)).
+    Only the top `pool_n` are ranked up front; the tail is sorted only if the caller
+    filters its way through the whole pool.
+    """
+    results = scored.values()
+    yield from heapq.nlargest(pool_n, results, key=_SCORE)
+    if pool_n < len(scored):
+        yield from sorted(results, key=_SCORE, reverse=True)[pool_n:]
+
 class TechniqueMatcher:
     def __init__(self, compendium: Compendium):
         self.comp = compendium
@@ -24,67 +57,77 @@ class TechniqueMatcher:
 
     def select(self, text: str, cmds: List[PFCLCommand], surface: str, tier: str, budget: float | None = None) -> Dict[str, Any]:
         budget_max = self.comp.budget(tier) if budget is None else budget
-        signals = self._signals(text)
+        signals = _compute_signals(text)
+        keywords = signals.keywords
         pfcl_names = [c.name for c in cmds]
+        pfcl_set = frozenset(pfcl_names)
+        # techniques the PFCL commands map to (same for every technique - build once)
+        mapped = set()
+        for cmd in pfcl_names:
+            mapped.update(self.comp.pfcl_map.get(cmd, _EMPTY))
         scored: Dict[str, MatchResult] = {}
 
+        # weights are per-compendium constants: resolve once, not per technique
+        sigw = self.sigw
+        pfcl_boost = float(sigw.get("pfcl_alias", 2.0))
+        kw_w = float(sigw.get("keyword_hit", 1.0))
+        amb_w = float((sigw.get("ambiguity_boost") or {}).get("weight", 0.8))
+        surface_w = float(sigw.get("surface_match", 0.2))
+        tier_w = float(sigw.get("tier_match", 0.2))
+        lp = sigw.get("length_penalty", {})
+        length_pen = float(lp.get("penalty", -0.4)) if signals.len < int(lp.get("min_chars", 50)) else 0.0
+
         # score by PFCL + rules + compatibility
         for tid, tech in self.comp.techniques.items():
-            s = 0.0; why = {"hits": []}
+            s = 0.0; hits = None  # hit list allocated on the first hit only
             # PFCL alias
-            pfcl_boost = float(self.sigw.get("pfcl_alias", 2.0))
-            mapped = set()
-            for cmd in pfcl_names:
-                mapped |= set(self.comp.pfcl_map.get(cmd, []))
             if tid in mapped:
-                s += pfcl_boost; why["hits"].append({"pfcl": True})
+                s += pfcl_boost; (hits := hits or []).append({"pfcl": True})
             # Technique aliases direct
-            for a in (tech.get("aliases") or []):
-                if a in pfcl_names:
-                    s += pfcl_boost; why["hits"].append({"alias": a})
+            for a in tech.aliases:
+                if a in pfcl_set:
+                    s += pfcl_boost; (hits := hits or []).append({"alias": a})
             # keyword rules
-            kw_w = float(self.sigw.get("keyword_hit", 1.0))
-            for rule in (tech.get("matcher_rules") or {}).get("signals", []):
-                t = rule.get("type")
+            for rule in tech.rules:
+                t = rule.type
                 if t == "keyword":
-                    hits = [k for k in rule.get("any", []) if k.lower() in signals["keywords"]]
-                    if hits: s += kw_w; why["hits"].append({"keywords": hits})
+                    # one set op against the prompt's frozenset; no per-keyword lower()/loop
+                    kw_hits = rule.any_lower_set & keywords
+                    if kw_hits:
+                        s += kw_w; (hits := hits or []).append({"keywords": sorted(kw_hits)})
                 elif t == "pfcl":
-                    inter = list(set(rule.get("any", [])) & set(pfcl_names))
-                    if inter: s += pfcl_boost; why["hits"].append({"pfcl_rule": inter})
+                    if not rule.any_set.isdisjoint(pfcl_set):
+                        s += pfcl_boost; (hits := hits or []).append({"pfcl_rule": list(rule.any_set & pfcl_set)})
                 elif t == "ambiguity":
-                    thr = float(rule.get("gte", 0.6))
-                    amb_w = float((self.sigw.get("ambiguity_boost") or {}).get("weight", 0.8))
-                    if signals["ambiguity"] >= thr: s += amb_w; why["hits"].append({"ambiguity": signals["ambiguity"]})
+                    if signals.ambiguity >= rule.gte: s += amb_w; (hits := hits or []).append({"ambiguity": signals.ambiguity})
             # compatibility bonuses
-            if surface in (tech.get("surfaces") or [surface]): s += float(self.sigw.get("surface_match", 0.2))
-            if tier in (tech.get("tiers") or [tier]): s += float(self.sigw.get("tier_match", 0.2))
+            if not tech.surfaces or surface in tech.surfaces: s += surface_w
+            if not tech.tiers or tier in tech.tiers: s += tier_w
             # length penalty
-            lp = self.sigw.get("length_penalty", {})
-            if signals["len"] < int(lp.get("min_chars", 50)): s += float(lp.get("penalty", -0.4))
-            if s != 0: scored[tid] = MatchResult(id=tid, score=s, why=why)
+            s += length_pen
+            if s != 0: scored[tid] = MatchResult(id=tid, score=s, why={"hits": hits or []})
 
         # choose under budget with conflicts + complements
-        ordered = sorted(scored.values(), key=lambda r: r.score, reverse=True)
         chosen: List[str] = []; used = 0.0
         maxn = int(self.sel.get("max_techniques", 6))
-        for r in ordered:
+        # top-K pool (3x headroom for compat/conflict/budget rejects) instead of a full sort
+        for r in _ranked(scored, maxn * 3):
             if len(chosen) >= maxn: break
             t = self.comp.techniques[r.id]
             if not self._compat(t, surface, tier): continue
             if self._conflicts(t, chosen): continue
-            if used + float((t.get("cost_estimate") or {}).get("tokens", 1.0)) > budget_max: continue
-            chosen.append(t.id); used += float((t.get("cost_estimate") or {}).get("tokens", 1.0))
+            if used + t.cost > budget_max: continue
+            chosen.append(t.id); used += t.cost
         # complement pass
         if self.sel.get("prefer_complements", True) and chosen:
             base = set(chosen)
             for cid in list(chosen):
-                for tid in (self.comp.techniques[cid].get("complements") or []):
+                for tid in self.comp.techniques[cid].complements:
                     if tid in base or tid not in self.comp.techniques: continue
                     t = self.comp.techniques[tid]
                     if not self._compat(t, surface, tier): continue
                     if self._conflicts(t, chosen): continue
-                    est = float((t.get("cost_estimate") or {}).get("tokens", 1.0))
+                    est = t.cost
                     if used + est > budget_max: continue
                     chosen.append(tid); used += est; base.add(tid)
                     if len(chosen) >= maxn: break
@@ -95,32 +138,25 @@ class TechniqueMatcher:
         chosen_expanded = [{
             "id": tid,
             "score": scored.get(tid).score if tid in scored else 0.0,
-            "fragments": self.comp.techniques[tid].get("template_fragments") or {},
-            "phase": self.comp.techniques[tid].get("phase") or []
+            "fragments": self.comp.techniques[tid].fragments,
+            "phase": self.comp.techniques[tid].phase
         } for tid in chosen]
 
         return {
             "chosen": chosen_expanded,
             "budget": {"max": budget_max, "used": round(used, 3)},
             "warnings": warnings,
-            "telemetry": {"signals": signals, "scores": {k: v.score for k, v in scored.items()}},
+            "telemetry": {"signals": signals._asdict(), "scores": {k: v.score for k, v in scored.items()}},
         }
 
     def _signals(self, text: str):
-        tl = text.lower();
-        kw = set(re.findall(r"[a-zA-Z][a-zA-Z0-9_\-]{2,}", tl))
-        vagues = {"maybe","somehow","something","stuff","thing","probably","kinda","sort","unsure"}
-        q = tl.count("?"); v = sum(1 for w in vagues if w in tl)
-        L = len(text.strip())
-        amb = 0.0 if L <= 1 else min(1.0, (q * 0.25 + v * 0.15 + (1 if L < 80 else 0) * 0.2))
-        return {"keywords": kw, "ambiguity": amb, "len": L}
+        return _compute_signals(text)._asdict()
 
     def _compat(self, t: Technique, surface: str, tier: str) -> bool:
-        s_ok = not t.get("surfaces") or surface in t.get("surfaces")
-        t_ok = not t.get("tiers") or tier in t.get("tiers")
+        s_ok = not t.surfaces or surface in t.surfaces
+        t_ok = not t.tiers or tier in t.tiers
         return s_ok and t_ok
 
     def _conflicts(self, t: Technique, chosen: List[str]) -> bool:
-        conf = set(t.get("conflicts_with") or [])
-        return any(c in conf for c in chosen)
+        return not t.conflicts.isdisjoint(chosen)
 
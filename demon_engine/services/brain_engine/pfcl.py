@@ -18,13 +18,20 @@ import re
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Tuple
 
+# Value coercion patterns, compiled once
+_INT_RE = re.compile(r"[+-]?\d+")
+_FLOAT_RE = re.compile(r"[+-]?(?:\d*\.\d+|\d+\.\d*)(?:[eE][+-]?\d+)?")
+_NUM_START = "+-.0123456789"
+_BOOL_WORDS = {"true": True, "false": False}
+
 @dataclass
 class PFCLCommand:
     name: str
     args: Dict[str, Any] = field(default_factory=dict)
 
 class PFCLParser:
-    _cmd_re = re.compile(r"/(\w+)(?=\s|$)")
+    # PFCL command names are ASCII identifiers
+    _cmd_re = re.compile(r"/(\w+)(?=\s|$)", re.ASCII)
     _tok_re = re.compile(
         r"\s+"                                 # whitespace
         r"|(?P<arraykey>\w+\[\w+\])\s*=\s*(?P<aval>\S+)"  # weight[context]=1.2
@@ -35,13 +42,14 @@ class PFCLParser:
     def parse(self, text: str) -> Tuple[List[PFCLCommand], str]:
         commands: List[PFCLCommand] = []
         consumed: List[Tuple[int, int]] = []
-        for m in self._cmd_re.finditer(text):
+        # one regex pass; each command's segment ends where the next match starts
+        matches = list(self._cmd_re.finditer(text))
+        n = len(matches)
+        for i, m in enumerate(matches):
             name = f"/{m.group(1)}"
             args: Dict[str, Any] = {}
-            pos = m.end()
-            nxt = self._cmd_re.search(text, pos)
-            end = nxt.start() if nxt else len(text)
-            seg = text[pos:end]
+            end = matches[i + 1].start() if i + 1 < n else len(text)
+            seg = text[m.end():end]
             for t in self._tok_re.finditer(seg):
                 if t.group(0).strip() == "":
                     continue
@@ -61,20 +69,22 @@ class PFCLParser:
         return commands, remainder.strip()
 
     def _coerce(self, s: str):
-        if s.lower() in ("true", "false"): return s.lower() == "true"
-        if re.fullmatch(r"[+-]?\d+", s):
-            try: return int(s)
-            except: pass
-        if re.fullmatch(r"[+-]?(?:\d*\.\d+|\d+\.\d*)(?:[eE][+-]?\d+)?", s):
-            try: return float(s)
-            except: pass
+        if len(s) in (4, 5):
+            b = _BOOL_WORDS.get(s.lower())
+            if b is not None: return b
+        # only numeric-looking tokens pay for the regexes; fullmatch guarantees int()/float() succeed
+        if s[:1] in _NUM_START or s[:1].isdecimal():
+            if _INT_RE.fullmatch(s): return int(s)
+            if _FLOAT_RE.fullmatch(s): return float(s)
         if (len(s) >= 2) and ((s[0] == s[-1] == '"') or (s[0] == s[-1] == "'")):
             return s[1:-1]
         return s
 
     def _strip(self, text: str, spans: List[Tuple[int, int]]):
+        # spans come from finditer: already ordered and non-overlapping
         if not spans: return text
-        spans = sorted(spans)
+        if len(spans) == 1 and spans[0][0] == 0:
+            return text[spans[0][1]:]
         out = []; cur = 0
         for s, e in spans:
             out.append(text[cur:s]); cur = e
@@ -4,56 +4,90 @@
 # demon_engine/services/brain_engine/pipeline_registry.py
 # =============================
 from __future__ import annotations
-from typing import Dict, Tuple, Optional
+from sys import intern
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, Tuple, Optional
 
 __all__ = ["PipelineRegistry"]
 
 Key = Tuple[str, str, str]  # (intent, mode, client)
 
+_NO_EDGES: Dict[str, Dict[str, str]] = {}
+_UNRESOLVED = object()  # memo sentinel (None is a cached miss)
+
+# Minimal default matrix with sensible fallbacks (built once at import, copied per registry)
+_DEFAULT_ENTRIES: Dict[Key, str] = {
+    # VS Code — Editor (Architect → Pro)
+    ("editor", "pro", "vscode"): "CodeForge.Architect.v1",  # pro_only: true, timeout_ms: 20000, max_passes: 2, cost_weight: medium, fallback_to: "editor/free/vscode", flags: ["enable_explain", "enforce_contract"]
+    # VS Code — Editor (Free fallback)
+    ("editor", "free", "vscode"): "CodeForge.Editor.Basic.v1",  # pro_only: false, timeout_ms: 12000, max_passes: 1, cost_weight: low, flags: ["enforce_contract"]
+    # Web — Chat (Oracle Ideas → Free)
+    ("chat", "free", "web"): "Oracle.Ideas.Basic.v1",  # pro_only: false, timeout_ms: 12000, max_passes: 1, cost_weight: low, flags: ["enable_explain", "enforce_contract"]
+    # Web — Chat (Oracle Ideas → Pro)
+    ("chat", "pro", "web"): "Oracle.Ideas.Pro.v1",  # pro_only: true, timeout_ms: 20000, max_passes: 2, cost_weight: medium, flags: ["enable_explain", "enforce_contract"]
+    # Cursor — Agent (Pro only)
+    ("agent", "pro", "cursor"): "Agent.DemonEngine.v1",  # pro_only: true, timeout_ms: 25000, max_passes: 2, cost_weight: high, flags: ["enable_explain", "enforce_contract"]
+    # Optional: Chrome chat
+    ("chat", "free", "chrome"): "Conversational.Basic.v1",
+    ("chat", "pro", "chrome"): "Conversational.LangGraph.v1",
+    # Legacy and fallback entries
+    ("prompt.upgrade", "free", "web"): "UpgradeLite",
+    ("prompt.upgrade", "pro",  "web"): "UpgradePro",
+    ("oracle.idea",    "free", "web"): "Oracle.Ideas.Basic",
+    ("oracle.idea",    "pro",  "web"): "Oracle.Ideas.Pro",
+    ("oracle.idea",    "free", "vscode"): "Oracle.Ideas.Basic",
+    ("oracle.idea",    "pro",  "vscode"): "Oracle.Ideas.Pro",
+    ("architect.plan", "free", "web"): "ArchLite",
+    ("architect.plan", "pro",  "web"): "CodeForge.Architect",
+    ("architect.plan", "free", "vscode"): "ArchLite",
+    ("architect.plan", "pro",  "vscode"): "CodeForge.Architect",
+    ("prompt.upgrade", "free", "*"):   "UpgradeLite",
+    ("prompt.upgrade", "pro",  "*"):   "UpgradePro",
+    ("*",              "free", "*"):   "DefaultFree",
+    ("*",              "pro",  "*"):   "DefaultPro",
+}
+# Interned once here, so a default registry is a plain C-level copy with no per-key work
+_DEFAULT_ITEMS: Tuple[Tuple[Key, str], ...] = tuple(
+    ((intern(i), intern(m), intern(c)), p) for (i, m, c), p in _DEFAULT_ENTRIES.items()
+)
+_DEFAULT_MATRIX: Mapping[Key, str] = MappingProxyType(dict(_DEFAULT_ITEMS))
+del _DEFAULT_ENTRIES
+
 class PipelineRegistry:
     """Lightweight mapping of (intent, mode, client) → pipeline name.
     Keeps legacy behavior while Demon Engine plans prompts.
+    Resolved lookups (wildcard cascade included) are memoized until the next register().
     """
+    # Bound on memoized query keys (clients/intents arrive from requests)
+    MAX_RESOLVED = 4096
 
     def __init__(self, matrix: Optional[Dict[Key, str]] = None, engine_version: str = "demon-2.1"):
-        # Provide a minimal default matrix with sensible fallbacks
-        self._matrix: Dict[Key, str] = matrix or {
-            # VS Code — Editor (Architect → Pro)
-            ("editor", "pro", "vscode"): "CodeForge.Architect.v1",  # pro_only: true, timeout_ms: 20000, max_passes: 2, cost_weight: medium, fallback_to: "editor/free/vscode", flags: ["enable_explain", "enforce_contract"]
-            # VS Code — Editor (Free fallback)
-            ("editor", "free", "vscode"): "CodeForge.Editor.Basic.v1",  # pro_only: false, timeout_ms: 12000, max_passes: 1, cost_weight: low, flags: ["enforce_contract"]
-            # Web — Chat (Oracle Ideas → Free)
-            ("chat", "free", "web"): "Oracle.Ideas.Basic.v1",  # pro_only: false, timeout_ms: 12000, max_passes: 1, cost_weight: low, flags: ["enable_explain", "enforce_contract"]
-            # Web — Chat (Oracle Ideas → Pro)
-            ("chat", "pro", "web"): "Oracle.Ideas.Pro.v1",  # pro_only: true, timeout_ms: 20000, max_passes: 2, cost_weight: medium, flags: ["enable_explain", "enforce_contract"]
-            # Cursor — Agent (Pro only)
-            ("agent", "pro", "cursor"): "Agent.DemonEngine.v1",  # pro_only: true, timeout_ms: 25000, max_passes: 2, cost_weight: high, flags: ["enable_explain", "enforce_contract"]
-            # Optional: Chrome chat
-            ("chat", "free", "chrome"): "Conversational.Basic.v1",
-            ("chat", "pro", "chrome"): "Conversational.LangGraph.v1",
-            # Legacy and fallback entries
-            ("prompt.upgrade", "free", "web"): "UpgradeLite",
-            ("prompt.upgrade", "pro",  "web"): "UpgradePro",
-            ("oracle.idea",    "free", "web"): "Oracle.Ideas.Basic",
-            ("oracle.idea",    "pro",  "web"): "Oracle.Ideas.Pro",
-            ("oracle.idea",    "free", "vscode"): "Oracle.Ideas.Basic",
-            ("oracle.idea",    "pro",  "vscode"): "Oracle.Ideas.Pro",
-            ("architect.plan", "free", "web"): "ArchLite",
-            ("architect.plan", "pro",  "web"): "CodeForge.Architect",
-            ("architect.plan", "free", "vscode"): "ArchLite",
-            ("architect.plan", "pro",  "vscode"): "CodeForge.Architect",
-            ("prompt.upgrade", "free", "*"):   "UpgradeLite",
-            ("prompt.upgrade", "pro",  "*"):   "UpgradePro",
-            ("*",              "free", "*"):   "DefaultFree",
-            ("*",              "pro",  "*"):   "DefaultPro",
-        }
+        # Own copy of the given (or default) matrix; key parts come from a tiny vocabulary: intern them so dict probes hit on identity
+        self._matrix: Dict[Key, str] = {
+            (intern(i), intern(m), intern(c)): p for (i, m, c), p in matrix.items()
+        } if matrix else _DEFAULT_MATRIX.copy()
+        # Same entries as a trie: intent → mode → client → pipeline ("*" is an ordinary edge)
+        self._trie: Dict[str, Dict[str, Dict[str, str]]] = {}
+        for (intent, mode, client), pipeline_name in self._matrix.items():
+            self._trie.setdefault(intent, {}).setdefault(mode, {})[client] = pipeline_name
         self._engine_version = engine_version
         self._killswitch: set[Key] = set()
         self._pro_only: set[Key] = set()
+        # query key → (pipeline_name, matched_key), or None for a cached miss
+        self._resolved: Dict[Key, Optional[Tuple[str, Key]]] = {}
 
     # ---- admin ops ----
     def register(self, intent: str, mode: str, client: str, pipeline_name: str) -> None:
+        intent, mode, client = intern(intent), intern(mode), intern(client)
         self._matrix[(intent, mode, client)] = pipeline_name
+        self._trie.setdefault(intent, {}).setdefault(mode, {})[client] = pipeline_name
+        self._resolved.clear()
+
+    def warm(self, known_keys: Iterable[Key]) -> None:
+        """Pre-resolve expected (intent, mode, client) queries at boot."""
+        for intent, mode, client in known_keys:
+            intent, mode, client = intern(intent), intern(mode), intern(client)
+            self._resolved[(intent, mode, client)] = self._resolve_uncached(intent, mode, client)
 
     def set_killswitch(self, key: Key, value: bool = True) -> None:
         if value: self._killswitch.add(key)
@@ -72,23 +106,29 @@ class PipelineRegistry:
     # ---- lookup ----
     def lookup(self, intent: str, mode: str, client: str) -> Tuple[str, Key]:
         """Return (pipeline_name, matched_key). Raises KeyError if nothing found."""
-        # Exact
-        key = (intent, mode, client)
-        if key in self._matrix:
-            return self._matrix[key], key
-        # Wildcards by client
-        key2 = (intent, mode, "*")
-        if key2 in self._matrix:
-            return self._matrix[key2], key2
-        # Intent wildcard by mode
-        key3 = ("*", mode, client)
-        if key3 in self._matrix:
-            return self._matrix[key3], key3
-        # Global tier default
-        key4 = ("*", mode, "*")
-        if key4 in self._matrix:
-            return self._matrix[key4], key4
-        raise KeyError(f"No pipeline for {intent}/{mode}/{client}")
+        # Hot path: one probe, no interning or exception frame on a memo hit
+        hit = self._resolved.get((intent, mode, client), _UNRESOLVED)
+        if hit is _UNRESOLVED:
+            intent, mode, client = intern(intent), intern(mode), intern(client)
+            hit = self._resolve_uncached(intent, mode, client)
+            if len(self._resolved) >= self.MAX_RESOLVED:
+                self._resolved.clear()
+            self._resolved[(intent, mode, client)] = hit
+        if hit is None:
+            raise KeyError(f"No pipeline for {intent}/{mode}/{client}")
+        return hit
+
+    def _resolve_uncached(self, intent: str, mode: str, client: str) -> Optional[Tuple[str, Key]]:
+        # Cascade order: exact → client wildcard → intent wildcard → global tier default,
+        # walked as trie edges (no wildcard tuple keys to build and hash)
+        for i in (intent, "*"):
+            by_client = self._trie.get(i, _NO_EDGES).get(mode)
+            if by_client:
+                for c in (client, "*"):
+                    pipeline_name = by_client.get(c)
+                    if pipeline_name is not None:
+                        return pipeline_name, (i, mode, c)
+        return None
 
     def get_engine_version(self) -> str:
         return self._engine_version
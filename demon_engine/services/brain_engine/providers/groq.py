@@ -1,39 +1,111 @@
-import httpx, os, time, asyncio, random
+import httpx, json, logging, os, time, asyncio, random
+from typing import Optional
 from .base import ProviderBase, LLMResult
 
+# HTTP/2 multiplexing needs the optional `h2` package (httpx[http2])
+try:
+    import h2  # noqa: F401
+    _HTTP2 = True
+except ImportError:
+    _HTTP2 = False
+
+# orjson encodes straight to bytes and decodes bytes without a text decode step
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+    _loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# Retry delays (s) per attempt, = min(2**attempt, 8), plus up to 0.2s jitter from a private PRNG
+_BACKOFF = (1.0, 2.0, 4.0, 8.0)
+_RNG = random.Random()
+
+_RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+_RETRYABLE_ERRORS = (httpx.TimeoutException, httpx.TransportError, httpx.HTTPStatusError)
+
+# Close tasks for clients retired by a loop switch
+_CLOSING: set = set()
+
+async def _sleep_backoff(attempt: int) -> None:
+    await asyncio.sleep(_BACKOFF[attempt] + _RNG.random() * 0.2)
+
 class GroqProvider(ProviderBase):
     URL = "https://api.groq.com/openai/v1/chat/completions"
     def __init__(self, api_key=None, timeout=60):
         self.api_key = api_key or os.getenv("GROQ_API_KEY", "")
         self.timeout = timeout
+        # Constant per provider: set once on the pooled client
+        self._headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        """Long-lived pooled client (keep-alive, HTTP/2 when available), one per event loop.
+        Built synchronously, so concurrent first calls can't race to create two."""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                self._retire_client(self._client, self._client_loop, loop)
+            self._client = httpx.AsyncClient(
+                http2=_HTTP2,
+                limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+                timeout=self.timeout,
+                headers=self._headers,
+            )
+            self._client_loop = loop
+        return self._client
+
+    @staticmethod
+    def _retire_client(client: httpx.AsyncClient, old_loop, loop) -> None:
+        """Close a pooled client left behind by a loop switch, so its connections don't leak.
+        Closed on its own loop when that loop is still alive, otherwise best-effort on this one."""
+        if old_loop is not None and not old_loop.is_closed():
+            asyncio.run_coroutine_threadsafe(client.aclose(), old_loop)
+            return
+        async def _close_quietly():
+            try:
+                await client.aclose()
+            except Exception as e:  # transports bound to a dead loop may not close cleanly
+                logger.debug("groq: closing stale client failed: %r", e)
+        task = loop.create_task(_close_quietly())
+        _CLOSING.add(task)  # strong ref until done (the loop only holds tasks weakly)
+        task.add_done_callback(_CLOSING.discard)
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
 
     async def complete(self, messages, model, **kw) -> LLMResult:
+        kw_get = kw.get
         payload = {
             "model": model,
             "messages": messages,
-            "max_tokens": kw.get("max_tokens", 800),
-            "temperature": kw.get("temperature", 0.2),
-            "stream": kw.get("stream", False),
+            "max_tokens": kw_get("max_tokens", 800),
+            "temperature": kw_get("temperature", 0.2),
+            "stream": kw_get("stream", False),
         }
-        print("[GROQ DEBUG] Payload to Groq API:", payload)
-        headers = {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
-        for attempt in range(4):
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("groq payload %r", payload)
+        body = _dumps(payload)  # encoded once, reused across retries
+        for attempt in range(len(_BACKOFF)):
             try:
-                async with httpx.AsyncClient(timeout=self.timeout) as c:
-                    r = await c.post(self.URL, headers=headers, json=payload)
+                r = await self._get_client().post(self.URL, content=body)
                 r.raise_for_status()
-                data = r.json()
+                data = _loads(r.content)
                 text = data["choices"][0]["message"]["content"]
                 usage = data.get("usage", {})
                 return LLMResult(text=text, model=model,
                                  tokens_in=usage.get("prompt_tokens"),
                                  tokens_out=usage.get("completion_tokens"))
-            except (httpx.TimeoutException, httpx.TransportError) as e:
-                await asyncio.sleep(min(2**attempt, 8) + random.random()*0.2)
-                continue
-            except httpx.HTTPStatusError as e:
-                if e.response.status_code in (429, 500, 502, 503, 504):
-                    await asyncio.sleep(min(2**attempt, 8) + random.random()*0.2)
-                    continue
-                raise
+            except _RETRYABLE_ERRORS as e:
+                # network errors always retry; HTTP errors only for throttling / 5xx
+                if isinstance(e, httpx.HTTPStatusError) and e.response.status_code not in _RETRYABLE_STATUS:
+                    raise
+                await _sleep_backoff(attempt)
         raise RuntimeError("Provider unavailable after retries")
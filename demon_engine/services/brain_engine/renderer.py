@@ -4,17 +4,50 @@
 # ==========================
 import json
 import os
+import re
+from itertools import chain, islice
 from string import Template
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from pathlib import Path
 
 try:
     import jinja2
+    from jinja2 import meta as jinja_meta
     from jinja2.sandbox import SandboxedEnvironment  # Secure Jinja2
     _HAS_JINJA = True
 except Exception:
     _HAS_JINJA = False
 
+# Template-injection / code-execution markers stripped from context strings, as one alternation
+_DANGEROUS_PATTERNS = (
+    "{{", "}}", "{%", "%}", "<%", "%>", "<script", "</script>",
+    "__import__", "eval(", "exec(", "subprocess", "os.system"
+)
+_DANGEROUS_RE = re.compile("|".join(map(re.escape, _DANGEROUS_PATTERNS)))
+# Context strings are truncated to this many chars before sanitizing
+_MAX_STRING = 5000
+# Fragment strings containing any of "/", "\\", ".j2", ".template", ".txt" are file paths
+_PATHY_RE = re.compile(r"[/\\]|\.(?:j2|template|txt)")
+# Context key missing from the sanitized context (distinct from any value)
+_ABSENT = object()
+
+def _template_vars(tmpl: Template) -> Tuple[str, ...]:
+    """Names a string.Template substitutes ($name / ${name})."""
+    names = {m.group("named") or m.group("braced") for m in tmpl.pattern.finditer(tmpl.template)}
+    names.discard(None)
+    return tuple(sorted(names))
+
+def _freeze(value: Any) -> Any:
+    # sanitized context values: scalars, lists of str, dicts of str
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, dict):
+        return tuple(value.items())
+    return value
+
+def _identity(value: Any) -> Any:
+    return value
+
 class SecureFragmentRenderer:
     """Secure template renderer with path validation and sandboxing"""
     
@@ -24,11 +57,11 @@ class SecureFragmentRenderer:
     }
     
     # Safe context variables only
-    SAFE_CONTEXT_KEYS = {
+    SAFE_CONTEXT_KEYS = frozenset({
         "prompt_text", "json_schema", "examples", "persona", 
         "objective", "constraints", "n", "axes", "tools", "contexts",
         "user_input", "system_prompt", "instructions"
-    }
+    })
     
     def __init__(self, fragments_root: str = "fragments"):
         self.root = Path(fragments_root).resolve()
@@ -43,7 +76,10 @@ class SecureFragmentRenderer:
                 loader=jinja2.FileSystemLoader(str(self.root)),
                 autoescape=True,  # Prevent XSS
                 trim_blocks=True,
-                lstrip_blocks=True
+                lstrip_blocks=True,
+                # Fragments are deploy-time assets: compile once, never re-stat
+                auto_reload=False,
+                cache_size=-1
             )
             # Disable dangerous functions
             self.env.globals.clear()
@@ -53,89 +89,153 @@ class SecureFragmentRenderer:
             self.env.filters['length'] = len
         else:
             self.env = None
+        # Compiled fragment templates by fragment path (Jinja or string.Template fallback)
+        self._tmpl_cache: Dict[str, Any] = {}
+        # Sanitized inline fragments by raw fragment text
+        self._inline_cache: Dict[str, Template] = {}
+        # Context keys each compiled fragment reads (None = unknown, never cached) and
+        # rendered output by (fragment, values of those keys)
+        self._frag_vars: Dict[str, Optional[Tuple[str, ...]]] = {}
+        self._render_cache: Dict[Tuple[Any, ...], str] = {}
+        # _validate_template_path verdicts and resolved paths, by fragment path
+        self._valid_path_cache: Dict[str, bool] = {}
+        self._resolved_paths: Dict[str, Path] = {}
+        # Bumped by reload_fragments; callers caching rendered output key on it
+        self.generation = 0
+        # Context value sanitizers by exact type (see _sanitize_context)
+        self._sanitizers = {
+            str: self._sanitize_string,
+            int: _identity, float: _identity, bool: _identity,
+            list: self._sanitize_seq, tuple: self._sanitize_seq,
+            dict: self._sanitize_dict,
+        }
+
+    def reload_fragments(self) -> None:
+        """Admin: forget validated paths and compiled templates (after fragments change on disk)."""
+        self._valid_path_cache.clear()
+        self._resolved_paths.clear()
+        self._tmpl_cache.clear()
+        self._inline_cache.clear()
+        self._frag_vars.clear()
+        self._render_cache.clear()
+        if self.env is not None and self.env.cache is not None:
+            self.env.cache.clear()
+        self.generation += 1
 
 class FragmentRenderer(SecureFragmentRenderer):
     """Legacy-compatible renderer with enhanced security"""
+    # Max memoized (fragment, context slice) renders
+    RENDER_CACHE_SIZE = 1024
     
     def render(self, plan: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
         # Sanitize context before rendering
         safe_context = self._sanitize_context(context)
         
         # Collect system/user strings in phase order: pre -> intra -> post
-        phases = {"pre": [], "intra": [], "post": []}
+        pre: List[Tuple[str, str]] = []; intra: List[Tuple[str, str]] = []; post: List[Tuple[str, str]] = []
+        phases = {"pre": pre.append, "intra": intra.append, "post": post.append}
         for item in plan.get("chosen", []):
             fr = item.get("fragments") or {}
             phs = item.get("phase") or []
+            add = None
             for role in ("system", "developer", "user"):
-                if fr.get(role):
-                    phases[phs[0] if phs else "intra"].append((role, fr[role]))
+                frag = fr.get(role)
+                if frag:
+                    if add is None:
+                        add = phases[phs[0]] if phs else intra.append
+                    add((role, frag))
         
-        # Render each fragment; concatenate per role
+        # Render each fragment against the one sanitized context; concatenate per role
         rendered = {"system": [], "developer": [], "user": []}
-        for phase in ("pre", "intra", "post"):
-            for role, frag_path_or_text in phases[phase]:
-                try:
-                    rendered_fragment = self._render_fragment(frag_path_or_text, safe_context)
-                    rendered[role].append(rendered_fragment)
-                except Exception as e:
-                    # Log error but continue with fallback
-                    import logging
-                    logging.error(f"Fragment rendering error: {e}")
-                    rendered[role].append(f"[RENDER_ERROR: {str(e)[:100]}]")
+        render_fragment = self._render_fragment
+        render_cache = self._render_cache
+        for role, frag_path_or_text in chain(pre, intra, post):
+            try:
+                # Output depends only on the fragment and the context keys it reads
+                key = self._render_key(frag_path_or_text, safe_context)
+                out = render_cache.get(key) if key is not None else None
+                if out is None:
+                    out = render_fragment(frag_path_or_text, safe_context)
+                    key = key or self._render_key(frag_path_or_text, safe_context)
+                    if key is not None:
+                        if len(render_cache) >= self.RENDER_CACHE_SIZE:
+                            del render_cache[next(iter(render_cache))]  # FIFO eviction
+                        render_cache[key] = out
+                rendered[role].append(out)
+            except Exception as e:
+                # Log error but continue with fallback
+                import logging
+                logging.error(f"Fragment rendering error: {e}")
+                rendered[role].append(f"[RENDER_ERROR: {str(e)[:100]}]")
         
         return {k: "\n\n".join(v) for k, v in rendered.items()}
     
     def _sanitize_context(self, ctx: Dict[str, Any]) -> Dict[str, Any]:
         """Sanitize context to prevent injection attacks"""
         safe_ctx = {}
+        safe_keys = self.SAFE_CONTEXT_KEYS
+        sanitizers = self._sanitizers
         
         for key, value in ctx.items():
             # Only allow whitelisted keys
-            if key not in self.SAFE_CONTEXT_KEYS:
+            if key not in safe_keys:
                 continue
-                
-            # Sanitize string values
-            if isinstance(value, str):
-                safe_ctx[key] = self._sanitize_string(value)
-            elif isinstance(value, (int, float, bool)):
-                safe_ctx[key] = value
-            elif isinstance(value, (list, tuple)):
-                safe_ctx[key] = [
-                    self._sanitize_string(str(item)) if isinstance(item, str) else str(item)
-                    for item in value[:10]  # Limit list size
-                ]
-            elif isinstance(value, dict):
-                # Recursively sanitize dict values (limit depth)
-                safe_ctx[key] = {
-                    k: self._sanitize_string(str(v)) if isinstance(v, str) else str(v)
-                    for k, v in list(value.items())[:10]  # Limit dict size
-                }
-            else:
-                safe_ctx[key] = str(value)[:1000]  # Convert to string with limit
+            # Exact-type dispatch; subclasses and other types take the isinstance path
+            fn = sanitizers.get(type(value))
+            safe_ctx[key] = fn(value) if fn is not None else self._sanitize_value(value)
         
         return safe_ctx
+
+    def _sanitize_value(self, value: Any) -> Any:
+        # Sanitize string values
+        if isinstance(value, str):
+            return self._sanitize_string(value)
+        elif isinstance(value, (int, float, bool)):
+            return value
+        elif isinstance(value, (list, tuple)):
+            return self._sanitize_seq(value)
+        elif isinstance(value, dict):
+            return self._sanitize_dict(value)
+        return str(value)[:1000]  # Convert to string with limit
+
+    def _sanitize_seq(self, value) -> List[str]:
+        return [
+            self._sanitize_string(item) if isinstance(item, str) else str(item)
+            for item in value[:10]  # Limit list size
+        ]
+
+    def _sanitize_dict(self, value: Dict[Any, Any]) -> Dict[Any, str]:
+        # Sanitize dict values (limit size)
+        return {
+            k: self._sanitize_string(v) if isinstance(v, str) else str(v)
+            for k, v in islice(value.items(), 10)  # Limit dict size (without copying all items)
+        }
     
     def _sanitize_string(self, text: str) -> str:
         """Basic string sanitization"""
         if not text:
             return ""
         
-        # Limit length
-        text = text[:5000]
+        # Limit length (sanitize only what's kept; short strings aren't copied)
+        if len(text) > _MAX_STRING:
+            text = text[:_MAX_STRING]
         
-        # Remove potential template injection patterns
-        dangerous_patterns = [
-            "{{", "}}", "{%", "%}", "<%", "%>", "<script", "</script>",
-            "__import__", "eval(", "exec(", "subprocess", "os.system"
-        ]
-        
-        for pattern in dangerous_patterns:
-            text = text.replace(pattern, "")
+        # Remove potential template injection patterns; repeat until clean so a
+        # removal can't splice a new marker together (e.g. "<scr{{ipt")
+        text, n = _DANGEROUS_RE.subn("", text)
+        while n:
+            text, n = _DANGEROUS_RE.subn("", text)
         
         return text
     
     def _validate_template_path(self, template_path: str) -> bool:
-        """Validate template path is within allowed directories"""
+        """Validate template path is within allowed directories (memoized per path)"""
+        cached = self._valid_path_cache.get(template_path)
+        if cached is None:
+            cached = self._valid_path_cache[template_path] = self._check_template_path(template_path)
+        return cached
+
+    def _check_template_path(self, template_path: str) -> bool:
         try:
             # Resolve the path and check if it's within allowed directories
             resolved_path = (self.root / template_path).resolve()
@@ -153,37 +253,71 @@ class FragmentRenderer(SecureFragmentRenderer):
             if resolved_path.suffix.lower() not in safe_extensions:
                 return False
             
+            self._resolved_paths[template_path] = resolved_path
             return True
         except Exception:
             return False
 
+    def _render_key(self, frag: str, ctx: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        names = self._frag_vars.get(frag)
+        if names is None:
+            return None
+        key = (frag, tuple(_freeze(ctx.get(n, _ABSENT)) for n in names))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def _jinja_vars(self, frag: str) -> Optional[Tuple[str, ...]]:
+        """Context names a Jinja fragment reads; None if it pulls in other templates."""
+        try:
+            ast = self.env.parse(self.env.loader.get_source(self.env, frag)[0])
+            if any(True for _ in jinja_meta.find_referenced_templates(ast)):
+                return None
+            return tuple(sorted(jinja_meta.find_undeclared_variables(ast)))
+        except Exception:
+            return None
+
     def _render_fragment(self, frag: str, ctx: Dict[str, Any]) -> str:
         # If looks like a file path, validate and render from file
-        if any(x in frag for x in ("/", ".j2", "\\", ".template", ".txt")):
+        if _PATHY_RE.search(frag):
             # Validate path before proceeding
             if not self._validate_template_path(frag):
                 return f"[INVALID_TEMPLATE_PATH: {frag}]"
             
             if _HAS_JINJA:
                 try:
-                    tmpl = self.env.get_template(frag)
-                    return tmpl.render(**ctx)
+                    tmpl = self._tmpl_cache.get(frag)
+                    if tmpl is None:
+                        tmpl = self._tmpl_cache[frag] = self.env.get_template(frag)
+                        self._frag_vars[frag] = self._jinja_vars(frag)
+                    # Render straight from the plan's shared context: no kwargs dict or globals merge per fragment
+                    return self.env.concat(tmpl.root_render_func(tmpl.new_context(ctx, shared=True)))
                 except Exception as e:
                     return f"[TEMPLATE_ERROR: {str(e)[:100]}]"
             else:
                 # fallback: treat file as Template with ${var}
                 try:
-                    template_path = self.root / frag
-                    src = template_path.read_text(encoding="utf-8")
-                    return Template(src).safe_substitute(**ctx)
+                    tmpl = self._tmpl_cache.get(frag)
+                    if tmpl is None:
+                        # validated above, so the resolved path is known
+                        template_path = self._resolved_paths.get(frag) or self.root / frag
+                        src = template_path.read_text(encoding="utf-8")
+                        tmpl = self._tmpl_cache[frag] = Template(src)
+                        self._frag_vars[frag] = _template_vars(tmpl)
+                    return tmpl.safe_substitute(ctx)
                 except FileNotFoundError:
                     return f"[MISSING_FRAGMENT: {frag}]"
                 except Exception as e:
                     return f"[FRAGMENT_ERROR: {str(e)[:100]}]"
         else:
-            # Inline template - sanitize before processing
-            safe_frag = self._sanitize_string(frag)
+            # Inline template - sanitize before processing (once per fragment text)
+            tmpl = self._inline_cache.get(frag)
+            if tmpl is None:
+                tmpl = self._inline_cache[frag] = Template(self._sanitize_string(frag))
+                self._frag_vars[frag] = _template_vars(tmpl)
             try:
-                return Template(safe_frag).safe_substitute(**ctx)
+                return tmpl.safe_substitute(ctx)
             except Exception as e:
                 return f"[INLINE_TEMPLATE_ERROR: {str(e)[:100]}]"
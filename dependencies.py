@@ -14,7 +14,63 @@ async def track_usage(user_id, source, action, details=None, credits_spent=0, db
         "credits_spent": credits_spent,
         "timestamp": datetime.utcnow()
     }
-    await db.usage.insert_one(usage_doc)
+    # Buffered: the background flusher writes it with the next insert_many batch
+    _usage_queue().put_nowait((db, usage_doc))
+
+# --- Usage write batching ---
+USAGE_BATCH_MAX = 500          # docs per insert_many
+USAGE_FLUSH_INTERVAL = 0.2     # seconds a batch may wait to fill
+_usage_buffer = None           # asyncio.Queue of (db, usage_doc); None = stop marker
+_usage_flusher = None          # background asyncio.Task draining _usage_buffer
+
+def _usage_queue():
+    """Return the usage buffer, starting the flusher task if it isn't running."""
+    global _usage_buffer, _usage_flusher
+    if _usage_buffer is None:
+        _usage_buffer = asyncio.Queue()
+    if _usage_flusher is None or _usage_flusher.done():
+        _usage_flusher = asyncio.create_task(_flush_usage_forever(_usage_buffer))
+    return _usage_buffer
+
+async def _flush_usage_forever(queue):
+    while True:
+        item = await queue.get()
+        # Give a burst time to accumulate unless a full batch is already waiting
+        if item is not None and queue.qsize() < USAGE_BATCH_MAX:
+            await asyncio.sleep(USAGE_FLUSH_INTERVAL)
+        batch = []
+        while item is not None:
+            batch.append(item)
+            if len(batch) >= USAGE_BATCH_MAX or queue.empty():
+                break
+            item = queue.get_nowait()
+        await _write_usage_batch(batch)
+        if item is None:
+            return
+
+async def _write_usage_batch(batch):
+    # Group by target database (callers may inject their own db handle)
+    by_db = {}
+    for target_db, doc in batch:
+        by_db.setdefault(id(target_db), (target_db, []))[1].append(doc)
+    for target_db, docs in by_db.values():
+        try:
+            # ordered=False: one bad doc doesn't block the rest of the batch
+            await target_db.usage.insert_many(docs, ordered=False)
+        except Exception as e:
+            logger.warning(f"Usage batch write failed ({len(docs)} docs): {e}")
+
+async def start_usage_flusher():
+    _usage_queue()
+
+async def stop_usage_flusher():
+    """Flush buffered usage events and stop the flusher (call on shutdown)."""
+    global _usage_flusher
+    if _usage_flusher is None or _usage_flusher.done():
+        return
+    _usage_buffer.put_nowait(None)
+    await _usage_flusher
+    _usage_flusher = None
 # Re-export require_user for API routers
 from auth import require_user
 # --- OracleService Dependency Injection ---
@@ -38,6 +94,8 @@ from dotenv import load_dotenv
 from fastapi import Depends, HTTPException, Request
 from pydantic import BaseModel, Field
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
+from bson import json_util
 
 from slowapi import Limiter
 from slowapi.util import get_remote_address
@@ -47,101 +105,117 @@ load_dotenv()
 logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO").upper(), format="%(asctime)s - %(levelname)s - %(message)s")
 logger = logging.getLogger("promptforge_api")
 # --- Stripe Webhook Idempotency ---
-async def is_duplicate_event(event_id: str) -> bool:
-	"""Check if the Stripe event_id has already been processed (idempotency)."""
-	doc = await db.webhook_events.find_one({"event_id": event_id})
-	return doc is not None
-
-async def mark_event_processed(event_id: str):
-	"""Mark the Stripe event_id as processed."""
-	await db.webhook_events.insert_one({"event_id": event_id, "processed_at": datetime.utcnow()})
+async def claim_event(event_id: str) -> bool:
+	"""Atomically mark the Stripe event_id as processed.
+	Returns True if this call claimed it, False if it was already processed.
+	One round-trip; the unique index on webhook_events.event_id arbitrates concurrent deliveries."""
+	try:
+		await db.webhook_events.insert_one({"event_id": event_id, "processed_at": datetime.utcnow()})
+		return True
+	except DuplicateKeyError:
+		return False
 
 # --- Index Ensurance ---
 async def ensure_indexes():
 	"""Ensure all critical database indexes are created for optimal performance"""
 	
 	try:
-		# Core Platform Collections
-		await safe_create_index(db.users, "uid", unique=True)
-		await safe_create_index(db.users, [("email", 1)], unique=True, sparse=True)
-		await safe_create_index(db.users, [("account_status", 1)])
-		await safe_create_index(db.users, [("subscription.tier", 1)])
-		await safe_create_index(db.users, [("last_active_at", -1)])
-		
-		await safe_create_index(db.prompts, [("user_id", 1), ("updated_at", -1)])
-		await safe_create_index(db.prompts, [("visibility", 1), ("deleted", 1)])
-		await safe_create_index(db.prompts, [("tags", 1)])
-		await safe_create_index(db.prompts, [("category", 1), ("status", 1)])
-		
-		await safe_create_index(db.prompt_versions, [("prompt_id", 1), ("version_number", -1)])
-		await safe_create_index(db.prompt_versions, [("created_at", -1)])
-		
-		await safe_create_index(db.ideas, [("user_id", 1), ("created_at", -1)])
-		await safe_create_index(db.ideas, [("category", 1)])
-		
-		# Financial & Transaction Collections
-		await safe_create_index(db.transactions, [("user_id", 1), ("created_at", -1)])
-		await safe_create_index(db.transactions, [("status", 1), ("type", 1)])
-		await safe_create_index(db.transactions, [("stripe_payment_intent", 1)], unique=True, sparse=True)
-		
-		# Security & Audit Collections
-		await safe_create_index(db.auth_logs, [("user_id", 1), ("timestamp", -1)])
-		await safe_create_index(db.auth_logs, [("event_type", 1), ("timestamp", -1)])
-		await safe_create_index(db.auth_logs, [("ip_address", 1)])
-		
-		# Usage and Analytics
-		await safe_create_index(db.usage, [("user_id", 1), ("timestamp", -1)])
-		await safe_create_index(db.usage, [("event_type", 1), ("timestamp", -1)])
-		
-		# System Operations
-		await safe_create_index(db.webhook_events, "event_id", unique=True)
-		await safe_create_index(db.webhook_events, [("processed_at", -1)])
-		
-		await safe_create_index(db.notifications, [("user_id", 1), ("read", 1)])
-		await safe_create_index(db.notifications, [("user_id", 1), ("created_at", -1)])
-		await safe_create_index(db.notifications, [("priority", 1), ("created_at", -1)])
-		await safe_create_index(db.notifications, [("category", 1), ("priority", 1), ("created_at", -1)])
-		await safe_create_index(db.notifications, [("expires_at", 1)], sparse=True)
-		
-		# Email Automation Collections
-		await safe_create_index(db.scheduled_emails, [("status", 1), ("scheduled_for", 1)])
-		await safe_create_index(db.scheduled_emails, [("user_id", 1), ("email_type", 1)])
-		await safe_create_index(db.scheduled_emails, [("sent_at", 1)])
-		
-		await safe_create_index(db.email_templates, [("email_type", 1)], unique=True)
-		
-		await safe_create_index(db.push_notifications, [("user_id", 1), ("sent_at", -1)])
-		
-		await safe_create_index(db.user_milestones, [("user_id", 1), ("achieved_at", -1)])
-		await safe_create_index(db.user_milestones, [("milestone_type", 1), ("milestone_value", 1)])
-		
-		await safe_create_index(db.bulk_notifications, [("sent_at", -1)])
-		await safe_create_index(db.billing_reminders, [("user_id", 1), ("sent_at", -1)])
-		
-		# User preference indexes for notifications
-		await safe_create_index(db.users, [("preferences.notifications.push", 1)], sparse=True)
-		await safe_create_index(db.users, [("last_active_at", 1), ("preferences.notifications.retention", 1)])
-		await safe_create_index(db.users, [("credits.balance", 1), ("preferences.notifications.credits", 1)])
-		await safe_create_index(db.users, [("subscription.expires_at", 1), ("subscription.status", 1)])
-		
-		# Marketplace (if collections exist)
-		await safe_create_index(db.marketplace_listings, [("seller_id", 1), ("created_at", -1)])
-		await safe_create_index(db.marketplace_listings, [("status", 1), ("visibility", 1)])
-		
-		await safe_create_index(db.marketplace_purchases, [("buyer_id", 1), ("created_at", -1)])
-		await safe_create_index(db.marketplace_purchases, [("seller_id", 1), ("created_at", -1)])
-		
-		# Legacy collections
-		await safe_create_index(db.listings, [("seller_id", 1), ("created_at", -1)])
-		
-		logger.info("✅ Database indexes ensured successfully")
+		# (collection, keys, create_index options)
+		specs = [
+			# Core Platform Collections
+			(db.users, "uid", {"unique": True}),
+			(db.users, [("email", 1)], {"unique": True, "sparse": True}),
+			(db.users, [("account_status", 1)], {}),
+			(db.users, [("subscription.tier", 1)], {}),
+			(db.users, [("last_active_at", -1)], {}),
+			
+			(db.prompts, [("user_id", 1), ("updated_at", -1)], {}),
+			(db.prompts, [("visibility", 1), ("deleted", 1)], {}),
+			(db.prompts, [("tags", 1)], {}),
+			(db.prompts, [("category", 1), ("status", 1)], {}),
+			
+			(db.prompt_versions, [("prompt_id", 1), ("version_number", -1)], {}),
+			(db.prompt_versions, [("created_at", -1)], {}),
+			
+			(db.ideas, [("user_id", 1), ("created_at", -1)], {}),
+			(db.ideas, [("category", 1)], {}),
+			
+			# Financial & Transaction Collections
+			(db.transactions, [("user_id", 1), ("created_at", -1)], {}),
+			(db.transactions, [("status", 1), ("type", 1)], {}),
+			(db.transactions, [("stripe_payment_intent", 1)], {"unique": True, "sparse": True}),
+			
+			# Security & Audit Collections
+			(db.auth_logs, [("user_id", 1), ("timestamp", -1)], {}),
+			(db.auth_logs, [("event_type", 1), ("timestamp", -1)], {}),
+			(db.auth_logs, [("ip_address", 1)], {}),
+			
+			# Usage and Analytics
+			(db.usage, [("user_id", 1), ("timestamp", -1)], {}),
+			(db.usage, [("event_type", 1), ("timestamp", -1)], {}),
+			
+			# System Operations
+			(db.webhook_events, "event_id", {"unique": True}),
+			(db.webhook_events, [("processed_at", -1)], {}),
+			
+			(db.notifications, [("user_id", 1), ("read", 1)], {}),
+			(db.notifications, [("user_id", 1), ("created_at", -1)], {}),
+			(db.notifications, [("priority", 1), ("created_at", -1)], {}),
+			(db.notifications, [("category", 1), ("priority", 1), ("created_at", -1)], {}),
+			(db.notifications, [("expires_at", 1)], {"sparse": True}),
+			
+			# Email Automation Collections
+			(db.scheduled_emails, [("status", 1), ("scheduled_for", 1)], {}),
+			(db.scheduled_emails, [("user_id", 1), ("email_type", 1)], {}),
+			(db.scheduled_emails, [("sent_at", 1)], {}),
+			
+			(db.email_templates, [("email_type", 1)], {"unique": True}),
+			
+			(db.push_notifications, [("user_id", 1), ("sent_at", -1)], {}),
+			
+			(db.user_milestones, [("user_id", 1), ("achieved_at", -1)], {}),
+			(db.user_milestones, [("milestone_type", 1), ("milestone_value", 1)], {}),
+			
+			(db.bulk_notifications, [("sent_at", -1)], {}),
+			(db.billing_reminders, [("user_id", 1), ("sent_at", -1)], {}),
+			
+			# User preference indexes for notifications
+			(db.users, [("preferences.notifications.push", 1)], {"sparse": True}),
+			(db.users, [("last_active_at", 1), ("preferences.notifications.retention", 1)], {}),
+			(db.users, [("credits.balance", 1), ("preferences.notifications.credits", 1)], {}),
+			(db.users, [("subscription.expires_at", 1), ("subscription.status", 1)], {}),
+			
+			# Marketplace (if collections exist)
+			(db.marketplace_listings, [("seller_id", 1), ("created_at", -1)], {}),
+			(db.marketplace_listings, [("status", 1), ("visibility", 1)], {}),
+			
+			(db.marketplace_purchases, [("buyer_id", 1), ("created_at", -1)], {}),
+			(db.marketplace_purchases, [("seller_id", 1), ("created_at", -1)], {}),
+			
+			# Legacy collections
+			(db.listings, [("seller_id", 1), ("created_at", -1)], {}),
+		]
+		# Issued together so Motor spreads them over the connection pool instead of one RTT each
+		results = await asyncio.gather(
+			*(safe_create_index(coll, keys, **opts) for coll, keys, opts in specs),
+			return_exceptions=True,
+		)
+		failed = 0
+		for (coll, keys, _), result in zip(specs, results):
+			if isinstance(result, BaseException):
+				failed += 1
+				logger.warning(f"Index creation warning for {coll.name} {keys}: {result}")
+		if failed:
+			logger.warning(f"⚠️ {failed}/{len(specs)} database indexes could not be ensured")
+		else:
+			logger.info("✅ Database indexes ensured successfully")
 		
 	except Exception as e:
 		logger.error(f"❌ Error ensuring indexes: {e}")
 		# Don't fail startup for index issues
 		
 async def safe_create_index(collection, keys, **options):
-	"""Safely create index, handling conflicts and existing indexes"""
+	"""Safely create index, skipping conflicts and existing indexes; other errors propagate to ensure_indexes"""
 	try:
 		await collection.create_index(keys, **options)
 	except Exception as e:
@@ -149,8 +223,8 @@ async def safe_create_index(collection, keys, **options):
 			# Index already exists, skip
 			pass
 		else:
-			logger.warning(f"Index creation warning for {collection.name}: {e}")
-			# Don't fail for index issues during startup
+			# Reported (and counted) by ensure_indexes; startup never fails for index issues
+			raise
 # dependencies.py - The Single Source of Truth
 # --- 2. Database & Cache Connections ---
 
@@ -161,41 +235,78 @@ mongo_client = AsyncIOMotorClient(MONGO_URL, tz_aware=True, tzinfo=timezone.utc)
 db = mongo_client[MONGO_DB]
 logger.info(f"✅ MongoDB connection established to {MONGO_URL}, database: {MONGO_DB} (tz_aware=True, tzinfo=UTC)")
 
-# --- Cache Helper Functions (with fallback) ---
+# --- Cache Helper Functions (Redis when REDIS_URL is set, no-op fallback otherwise) ---
+try:
+    import redis.asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+REDIS_URL = os.getenv("REDIS_URL")
+# from_url only builds the pool; connections open lazily on first command
+redis_client = aioredis.from_url(REDIS_URL, decode_responses=True) if (aioredis and REDIS_URL) else None
+if redis_client is not None:
+    logger.info("✅ Redis cache enabled")
+else:
+    logger.info("ℹ️ REDIS_URL not set or redis not installed - cache disabled")
+
+_GLOB_CHARS = frozenset("*?[")
+
 def cache_key(*parts: str) -> str:
     """Generate a cache key from parts"""
     return ":".join(str(p) for p in parts)
 
 async def cache_get(key: str) -> Optional[str]:
     """Get value from cache with fallback"""
-    try:
-        # If you have Redis or another cache, implement it here
-        # For now, we'll just return None (no cache)
+    if redis_client is None:
         return None
+    try:
+        return await redis_client.get(key)
     except Exception as e:
         logger.warning(f"Cache get failed for key {key}: {e}")
         return None
 
 async def cache_set(key: str, value: str, ttl: int = 300) -> bool:
     """Set value in cache with fallback"""
+    if redis_client is None:
+        return True
     try:
-        # If you have Redis or another cache, implement it here
-        # For now, we'll just return True (no cache)
+        await redis_client.set(key, value, ex=ttl)
         return True
     except Exception as e:
         logger.warning(f"Cache set failed for key {key}: {e}")
         return False
 
 async def cache_delete(pattern: str) -> bool:
-    """Delete cache keys by pattern with fallback"""
+    """Delete cache keys by pattern with fallback (plain keys are unlinked directly, globs via SCAN)"""
+    if redis_client is None:
+        return True
     try:
-        # If you have Redis or another cache, implement it here
-        # For now, we'll just return True (no cache)
+        if _GLOB_CHARS.isdisjoint(pattern):
+            await redis_client.unlink(pattern)
+            return True
+        # SCAN is incremental (unlike KEYS), UNLINK frees memory off the main thread
+        batch = []
+        async for key in redis_client.scan_iter(match=pattern, count=500):
+            batch.append(key)
+            if len(batch) >= 500:
+                await redis_client.unlink(*batch)
+                batch.clear()
+        if batch:
+            await redis_client.unlink(*batch)
         return True
     except Exception as e:
         logger.warning(f"Cache delete failed for pattern {pattern}: {e}")
         return False
 
+# Authenticated user profiles (get_current_user), cache-aside with a short TTL
+USER_CACHE_TTL = 60
+# Same datetime handling as the Motor client (tz-aware UTC) so cached profiles match fresh ones
+_USER_JSON_OPTIONS = json_util.JSONOptions(tz_aware=True, tzinfo=timezone.utc)
+
+async def invalidate_user_cache(uid: str) -> None:
+    """Drop the cached profile after any write to the user's document."""
+    await cache_delete(cache_key("user", uid))
+
 # --- 7. Re-usable Helper Functions ---
 @asynccontextmanager
 async def performance_monitor(operation_name: str):
@@ -361,6 +472,11 @@ async def get_current_user(request: Request) -> dict:
     if not uid:
         raise HTTPException(status_code=401, detail="No user_id or uid found in token claims. Token may be invalid or not a Firebase ID token.")
     
+    user_cache_key = cache_key("user", uid)
+    cached = await cache_get(user_cache_key)
+    if cached:
+        return json_util.loads(cached, json_options=_USER_JSON_OPTIONS)
+    
     user_doc = await db.users.find_one({"_id": uid})
     if not user_doc:
         raise HTTPException(status_code=404, detail="User not found")
@@ -408,6 +524,7 @@ async def get_current_user(request: Request) -> dict:
         v = public_profile.get(k)
         if v and hasattr(v, "isoformat"):
             public_profile[k] = v.isoformat()
+    await cache_set(user_cache_key, json_util.dumps(public_profile, json_options=_USER_JSON_OPTIONS), USER_CACHE_TTL)
     return public_profile
 
 
@@ -12,7 +12,7 @@ from services.analytics_service import AnalyticsService
 from middleware.security import security_middleware
 from middleware.error_handler import global_exception_handler
 from config.environment import get_config
-from dependencies import ensure_indexes
+from dependencies import ensure_indexes, start_usage_flusher, stop_usage_flusher
 # main.py - Orchestrator Only
 import os, sys, logging, asyncio
 from datetime import datetime
@@ -246,7 +246,9 @@ async def analytics_events_double_slash_fix(request: Request):
 @app.on_event("startup")
 async def startup_event():
     await db.command("ping")
-    await ensure_indexes()
+    # Index ensurance runs alongside startup (existing indexes are no-ops); keep a reference so it isn't GC'd
+    app.state._index_task = asyncio.create_task(ensure_indexes())
+    await start_usage_flusher()
     if n8n:
         await n8n.startup()
     
@@ -262,12 +264,18 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    index_task = getattr(app.state, "_index_task", None)
+    if index_task and not index_task.done():
+        index_task.cancel()
     if n8n:
         await n8n.shutdown()
     
     # Stop background email service
     from services.background_email_service import background_email_service
     await background_email_service.stop()
+    
+    # Write any buffered usage events
+    await stop_usage_flusher()
 
 # --- Main Execution ---
 if __name__ == "__main__":
@@ -6,7 +6,7 @@ import asyncio
 import datetime
 from typing import Dict, Optional, Any
 from fastapi import HTTPException, Depends
-from dependencies import db
+from dependencies import db, invalidate_user_cache
 import logging
 
 logger = logging.getLogger(__name__)
@@ -143,6 +143,7 @@ class AtomicCreditManager:
                 )
             
             new_balance = result.get("credits", {}).get("balance", 0)
+            await invalidate_user_cache(user_id)
             
             # Log successful transaction
             await db.audit_logs.insert_one({
@@ -206,6 +207,7 @@ class AtomicCreditManager:
             )
             
             new_balance = result.get("credits", {}).get("balance", amount)
+            await invalidate_user_cache(user_id)
             
             # Log transaction
             await db.audit_logs.insert_one({
@@ -37,6 +37,7 @@ async def verify_signature(provider: str, request: Request) -> bool:
     return True
 
 from utils.cache import invalidate_cache
+from dependencies import invalidate_user_cache
 async def process_payment_event(provider: str, event: dict):
     debug_log(f"[process_payment_event] Provider: {provider}, Event: {event}")
     """Process payment/subscription event and upsert user/org in MongoDB. Invalidate entitlements cache."""
@@ -95,6 +96,7 @@ async def process_payment_event(provider: str, event: dict):
         await db.orgs.update_one({"_id": subject_id}, {"$set": update}, upsert=True)
     else:
         await db.users.update_one({"_id": subject_id}, {"$set": update}, upsert=True)
+        await invalidate_user_cache(subject_id)
     # Invalidate entitlements cache
     cache_key = f"entitlements:{subject_id}"
     invalidate_cache(cache_key)
@@ -102,7 +104,7 @@ async def process_payment_event(provider: str, event: dict):
 
 
 from fastapi import Request
-from dependencies import db
+from dependencies import db, invalidate_user_cache
 import datetime
 
 def entitlement_guard(route_key: str, cost_table: dict, explain: bool = False):
@@ -140,6 +142,7 @@ def entitlement_guard(route_key: str, cost_table: dict, explain: bool = False):
                         {"$set": {"subscription.tier": "free", "subscription.status": "canceled", "updated_at": now}},
                         upsert=True
                     )
+                    await invalidate_user_cache(subject_id)
                     raise HTTPException(status_code=402, detail={"error": "billing_required", "upgrade_url": "/pricing"})
         # Atomic credit debit
         filter = {"_id": subject_id, "credits.balance": {"$gte": cost}}
@@ -155,6 +158,7 @@ def entitlement_guard(route_key: str, cost_table: dict, explain: bool = False):
         doc = await db.users.find_one_and_update(filter, update, return_document=True)
         if not doc:
             raise HTTPException(status_code=402, detail={"error": "insufficient_credits", "required": cost, "available": credits.get("balance", 0), "upgrade_url": "/pricing"})
+        await invalidate_user_cache(subject_id)
         return True
     return dependency
 import requests